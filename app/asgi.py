@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_asgi_application()
+
+# Load or generate the OpenAPI schema once, before serving requests.
+from core.schema import get_schema  # noqa: E402
+
+get_schema()
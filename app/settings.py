@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'user',
     'recipe',
@@ -46,6 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.db.router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,14 +86,33 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql_pool',
         'HOST': 'localhost',
         'NAME': 'recipe-app',
         'USER': 'postgres',
-        'PASSWORD': 'alvan2327'
+        'PASSWORD': 'alvan2327',
+        # Hand connections back to the pool at the end of each request.
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MIN_SIZE': 2,
+            'MAX_SIZE': 20,
+            'TIMEOUT': 10,
+            'MAX_IDLE': 300,
+            'HEALTH_CHECK_AFTER': 30,
+        },
     }
 }
 
+DATABASE_ROUTERS = ['core.db.router.ReplicaRouter']
+
+# Read replicas, as extra DATABASES aliases, used by core.db.router
+DATABASE_REPLICAS = {
+    'ALIASES': [],
+    'PIN_SECONDS': 5,
+    'MAX_LAG_SECONDS': 10,
+    'CHECK_INTERVAL': 5,
+    'PRIMARY_APPS': ['authtoken'],
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -135,4 +159,50 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Token lookups cached by core.authentication.CachedTokenAuthentication
+AUTH_TOKEN_CACHE = {
+    'TIMEOUT': 300,
+    'LOCAL_TIMEOUT': 5,
+    'LOCAL_MAX_ENTRIES': 10000,
+}
+
+# Rendered recipe and tag responses cached by recipe.caching
+API_RESPONSE_CACHE = {
+    'TIMEOUT': 600,
+}
+
+# Per-view request metrics from core.middleware.MetricsMiddleware
+METRICS = {
+    'SERVER_TIMING': True,
+    # Addresses or networks allowed to read /metrics besides staff users.
+    # Behind a proxy REMOTE_ADDR is the proxy, so keep /metrics off it.
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+# Sampled slow query logging and cProfile dumps by core.profiling
+PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATES': {
+        '/api/recipe/': 0.01,
+        '/api/user/': 0.01,
+    },
+    'SLOW_QUERY_MS': 100,
+    'PROFILE_DIR': None,
+}
+
+# Prebuilt OpenAPI schema served by core.views.SchemaView, see core.schema
+OPENAPI_SCHEMA = {
+    'ARTIFACT_PATH': os.environ.get('OPENAPI_SCHEMA_ARTIFACT'),
+    'VERSION': os.environ.get('APP_VERSION'),
 }
@@ -14,17 +14,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import (
-    SpectacularSwaggerView,
-    SpectacularAPIView
-)
+from drf_spectacular.views import SpectacularSwaggerView
 
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import SchemaView, metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path('api/schema/', SchemaView.as_view(), name='api-schema'),
     path(
         'api/docs/',
         SpectacularSwaggerView.as_view(url_name='api-schema'),
@@ -32,4 +31,5 @@ urlpatterns = [
     ),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# Load or generate the OpenAPI schema once, before serving requests.
+from core.schema import get_schema  # noqa: E402
+
+get_schema()
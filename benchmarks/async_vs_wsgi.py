@@ -0,0 +1,145 @@
+"""
+Compare concurrent throughput of the async recipe views under ASGI with
+the DRF views under WSGI.
+
+Both paths run in-process against a throwaway test database:
+
+    python -m benchmarks.async_vs_wsgi --recipes 1000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+)
+from django.urls import reverse  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from core.models import Recipe, Tag  # noqa: E402
+
+# Response and token caches would hide the view cost being compared.
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def seed(recipes, tags_per_recipe=3):
+    """Create a user with recipes and return its token key"""
+    user = get_user_model().objects.create_user(
+        email='bench@example.com', password='benchPass123')
+    tags = Tag.objects.bulk_create(
+        [Tag(user=user, name=f'Tag {i}') for i in range(tags_per_recipe)])
+    created = Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=10,
+            price=Decimal('5.25'),
+        )
+        for i in range(recipes)
+    ])
+    through = Recipe.tags.through
+    through.objects.bulk_create([
+        through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in created for tag in tags
+    ])
+    return Token.objects.create(user=user).key, created[0].id
+
+
+def summarize(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f'{name:<28} {len(latencies) / elapsed:>9.1f} req/s'
+        f'  p50 {quantiles[49] * 1000:>7.2f} ms'
+        f'  p95 {quantiles[94] * 1000:>7.2f} ms'
+    )
+
+
+def run_wsgi(url, token, requests, concurrency):
+    """Drive the WSGI handler from a pool of threads"""
+    def call(_):
+        client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+        start = time.perf_counter()
+        res = client.get(url)
+        assert res.status_code == 200, res.content
+        connections.close_all()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+async def run_asgi(url, token, requests, concurrency):
+    """Drive the ASGI handler with concurrent tasks on one loop"""
+    client = AsyncClient()
+    headers = {'Authorization': f'Token {token}'}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            start = time.perf_counter()
+            res = await client.get(url, headers=headers)
+            assert res.status_code == 200, res.content
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(call() for _ in range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(CACHES=NO_CACHE):
+            token, recipe_id = seed(args.recipes)
+            query = f'?page_size={args.page_size}'
+            pairs = [
+                ('recipe list',
+                 reverse('recipe:recipe-list') + query,
+                 reverse('recipe:async-recipe-list') + query),
+                ('recipe detail',
+                 reverse('recipe:recipe-detail', args=[recipe_id]),
+                 reverse('recipe:async-recipe-detail', args=[recipe_id])),
+                ('tag list',
+                 reverse('recipe:tag-list'),
+                 reverse('recipe:async-tag-list')),
+            ]
+            for name, sync_url, async_url in pairs:
+                summarize(f'{name} (WSGI)', *run_wsgi(
+                    sync_url, token, args.requests, args.concurrency))
+                summarize(f'{name} (ASGI)', *asyncio.run(run_asgi(
+                    async_url, token, args.requests, args.concurrency)))
+    finally:
+        connections.close_all()
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+"""
+Benchmark every recipe, tag and user route as the data set grows.
+
+Each size seeds a user with that many recipes in a throwaway test
+database, then calls every route in-process and reports req/s,
+p50/p95/p99 latency and queries per request:
+
+    python -m benchmarks.endpoints --save-baseline baseline.json
+    python -m benchmarks.endpoints --baseline baseline.json
+
+With --baseline the run exits non-zero when a route got slower than the
+tolerance allows or runs more queries than before. The run also times
+a few reads with and without MetricsMiddleware in interleaved repeats,
+and fails when every repeat puts the middleware more than
+--max-metrics-overhead above the bare median.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+django.setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+)
+from django.urls import reverse  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from core.models import Recipe, Tag  # noqa: E402
+
+# Response caching would turn repeated reads into cache hits.
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+SEED_BATCH = 5000
+TAGS_PER_USER = 20
+TAGS_PER_RECIPE = 3
+PASSWORD = 'benchPass123'
+METRICS_MIDDLEWARE = 'core.middleware.MetricsMiddleware'
+# Reads timed with and without MetricsMiddleware.
+OVERHEAD_SCENARIOS = ('recipe list', 'recipe detail', 'tag list', 'user me')
+
+
+def seed(size):
+    """Create a user owning `size` recipes, returning the bench state"""
+    user = get_user_model().objects.create_user(
+        email=f'bench-{size}@example.com', password=PASSWORD)
+    tags = Tag.objects.bulk_create(
+        [Tag(user=user, name=f'Tag {i}') for i in range(TAGS_PER_USER)])
+
+    recipe_ids = []
+    through = Recipe.tags.through
+    for start in range(0, size, SEED_BATCH):
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                description=f'Slow cooked dish number {i}',
+                time_minutes=5 + i % 90,
+                price=Decimal('5.25'),
+            )
+            for i in range(start, min(start + SEED_BATCH, size))
+        ])
+        through.objects.bulk_create([
+            through(recipe_id=recipe.id, tag_id=tag.id)
+            for i, recipe in enumerate(recipes, start)
+            for tag in itertools.islice(
+                itertools.cycle(tags), i % TAGS_PER_USER,
+                i % TAGS_PER_USER + TAGS_PER_RECIPE)
+        ])
+        recipe_ids.extend(recipe.id for recipe in recipes)
+
+    return {
+        'user': user,
+        'token': Token.objects.create(user=user).key,
+        'recipe_ids': recipe_ids,
+        'tag_ids': [tag.id for tag in tags],
+        'counter': itertools.count(),
+    }
+
+
+def new_recipe(state):
+    """Create an untimed recipe for routes that consume one"""
+    return Recipe.objects.create(
+        user=state['user'], title='Disposable', time_minutes=5,
+        price=Decimal('1.00'),
+    ).id
+
+
+def recipe_payload(n):
+    return {
+        'title': f'Bench recipe {n}',
+        'time_minutes': 30,
+        'price': '12.50',
+        'tags': [{'name': 'Tag 1'}, {'name': f'New tag {n}'}],
+    }
+
+
+def recipe_detail(state):
+    return reverse('recipe:recipe-detail', args=[state['recipe_ids'][0]])
+
+
+# (name, method, prepare(state) -> (url, data), requests per run)
+# Routes hashing passwords are slow by design and run fewer requests.
+SCENARIOS = [
+    ('recipe list', 'get', lambda state: (
+        reverse('recipe:recipe-list'), None), None),
+    ('recipe list page_size=200', 'get', lambda state: (
+        reverse('recipe:recipe-list'), {'page_size': 200}), None),
+    ('recipe list fields=id,title', 'get', lambda state: (
+        reverse('recipe:recipe-list'), {'fields': 'id,title'}), None),
+    ('recipe list tags=any', 'get', lambda state: (
+        reverse('recipe:recipe-list'),
+        {'tags': ','.join(map(str, state['tag_ids'][:3]))}), None),
+    ('recipe list tags=all', 'get', lambda state: (
+        reverse('recipe:recipe-list'),
+        {'tags': ','.join(map(str, state['tag_ids'][:2])),
+         'tags_match': 'all'}), None),
+    ('recipe create', 'post', lambda state: (
+        reverse('recipe:recipe-list'),
+        recipe_payload(next(state['counter']))), None),
+    ('recipe detail', 'get', lambda state: (
+        recipe_detail(state), None), None),
+    ('recipe update', 'patch', lambda state: (
+        recipe_detail(state),
+        {'title': f'Renamed {next(state["counter"])}'}), None),
+    ('recipe replace', 'put', lambda state: (
+        recipe_detail(state), recipe_payload(0)), None),
+    ('recipe delete', 'delete', lambda state: (
+        reverse('recipe:recipe-detail', args=[new_recipe(state)]),
+        None), None),
+    ('recipe bulk 50 creates', 'post', lambda state: (
+        reverse('recipe:recipe-bulk'),
+        [{'op': 'create', 'data': recipe_payload(next(state['counter']))}
+         for _ in range(50)]), 20),
+    ('recipe export ndjson', 'get', lambda state: (
+        reverse('recipe:recipe-export'), {'type': 'ndjson'}), 5),
+    ('recipe export csv', 'get', lambda state: (
+        reverse('recipe:recipe-export'), {'type': 'csv'}), 5),
+    ('tag list', 'get', lambda state: (
+        reverse('recipe:tag-list'), None), None),
+    ('tag list recipe_count', 'get', lambda state: (
+        reverse('recipe:tag-list'),
+        {'recipe_count': 1, 'assigned_only': 1}), None),
+    ('tag update', 'patch', lambda state: (
+        reverse('recipe:tag-detail', args=[state['tag_ids'][-1]]),
+        {'name': f'Renamed tag {next(state["counter"])}'}), None),
+    ('tag delete', 'delete', lambda state: (
+        reverse('recipe:tag-detail', args=[Tag.objects.create(
+            user=state['user'],
+            name=f'Disposable {next(state["counter"])}').id]),
+        None), None),
+    ('async recipe list', 'aget', lambda state: (
+        reverse('recipe:async-recipe-list'), None), None),
+    ('async recipe detail', 'aget', lambda state: (
+        reverse('recipe:async-recipe-detail',
+                args=[state['recipe_ids'][0]]), None), None),
+    ('async tag list', 'aget', lambda state: (
+        reverse('recipe:async-tag-list'), None), None),
+    ('user create', 'post', lambda state: (
+        reverse('user:create'),
+        {'email': f'new-{state["user"].pk}-{next(state["counter"])}'
+                  '@example.com',
+         'password': PASSWORD, 'name': 'Bench'}), 10),
+    ('user token', 'post', lambda state: (
+        reverse('user:token'),
+        {'email': state['user'].email, 'password': PASSWORD}), 10),
+    ('user me', 'get', lambda state: (reverse('user:me'), None), None),
+    ('user me update', 'patch', lambda state: (
+        reverse('user:me'), {'name': 'Bench user'}), None),
+]
+
+
+def call_sync(client, method, url, data):
+    if method == 'get':
+        return client.get(url, data)
+    return getattr(client, method)(
+        url, json.dumps(data), content_type='application/json')
+
+
+def run_sync(client, state, method, prepare, requests):
+    """Time requests through the WSGI handler, one at a time"""
+    latencies, queries = [], []
+    for _ in range(requests):
+        url, data = prepare(state)
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            res = call_sync(client, method, url, data)
+            if res.streaming:
+                b''.join(res.streaming_content)
+            latencies.append(time.perf_counter() - start)
+        assert res.status_code < 400, (url, res.status_code, res.content)
+        queries.append(len(ctx))
+    return latencies, queries
+
+
+async def run_async(state, prepare, requests):
+    """Time GET requests through the ASGI handler, one at a time"""
+    client = AsyncClient()
+    headers = {'Authorization': f'Token {state["token"]}'}
+    latencies, queries = [], []
+    try:
+        for _ in range(requests):
+            url, data = await sync_to_async(prepare)(state)
+            # Async views run their queries in the sync_to_async thread,
+            # so capture them there.
+            ctx = CaptureQueriesContext(connection)
+            await sync_to_async(ctx.__enter__)()
+            start = time.perf_counter()
+            res = await client.get(url, data, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            await sync_to_async(ctx.__exit__)(None, None, None)
+            assert res.status_code < 400, (
+                url, res.status_code, res.content)
+            queries.append(ctx.final_queries - ctx.initial_queries)
+    finally:
+        # That thread's connections are out of reach of close_all() in
+        # the main thread, and an open one blocks dropping the database.
+        await sync_to_async(connections.close_all)()
+    return latencies, queries
+
+
+def metrics_overhead(state, prepare, requests, warmup, repeats):
+    """Return the sorted overheads MetricsMiddleware adds per repeat"""
+    auth = f'Token {state["token"]}'
+    without = [
+        name for name in settings.MIDDLEWARE if name != METRICS_MIDDLEWARE]
+    # Clients load the middleware on their first request.
+    with override_settings(MIDDLEWARE=without):
+        bare = Client(HTTP_AUTHORIZATION=auth)
+        bare.get(*prepare(state))
+    instrumented = Client(HTTP_AUTHORIZATION=auth)
+    instrumented.get(*prepare(state))
+
+    overheads = []
+    for _ in range(repeats):
+        # Alternate the two, swapping who goes first, so drift and
+        # warm caches hit both alike.
+        latencies = {bare: [], instrumented: []}
+        for i in range(requests + warmup):
+            pair = (bare, instrumented) if i % 2 else (instrumented, bare)
+            for client in pair:
+                url, data = prepare(state)
+                start = time.perf_counter()
+                res = client.get(url, data)
+                latencies[client].append(time.perf_counter() - start)
+                assert res.status_code < 400, (url, res.status_code)
+        overheads.append(
+            statistics.median(latencies[instrumented][warmup:])
+            / statistics.median(latencies[bare][warmup:]) - 1)
+    return sorted(overheads)
+
+
+def summarize(latencies, queries, warmup):
+    latencies, queries = latencies[warmup:], queries[warmup:]
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(latencies),
+        'req_per_s': len(latencies) / sum(latencies),
+        'p50_ms': quantiles[49] * 1000,
+        'p95_ms': quantiles[94] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'queries': statistics.mean(queries),
+    }
+
+
+def report(key, result, baseline_result=None):
+    line = (
+        f'{key:<40} {result["req_per_s"]:>9.1f} req/s'
+        f'  p50 {result["p50_ms"]:>8.2f}'
+        f'  p95 {result["p95_ms"]:>8.2f}'
+        f'  p99 {result["p99_ms"]:>8.2f} ms'
+        f'  {result["queries"]:>6.1f} queries'
+    )
+    if baseline_result:
+        change = result['p95_ms'] / baseline_result['p95_ms'] - 1
+        line += f'  p95 {change:+.0%}'
+    print(line, flush=True)
+
+
+def regressions(results, baseline, tolerance):
+    """Return routes slower or chattier than the baseline"""
+    found = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            found.append(
+                f'{key}: p95 {before["p95_ms"]:.2f} -> '
+                f'{result["p95_ms"]:.2f} ms')
+        if result['queries'] > before['queries']:
+            found.append(
+                f'{key}: queries {before["queries"]:.1f} -> '
+                f'{result["queries"]:.1f}')
+    return found
+
+
+def run(args, baseline):
+    results, overheads = {}, {}
+    for size in args.sizes:
+        started = time.perf_counter()
+        state = seed(size)
+        print(
+            f'Seeded {size} recipes in {time.perf_counter() - started:.1f}s',
+            flush=True)
+        client = Client(HTTP_AUTHORIZATION=f'Token {state["token"]}')
+
+        for name, method, prepare, requests in SCENARIOS:
+            if args.only and not any(part in name for part in args.only):
+                continue
+            requests = min(requests or args.requests, args.requests)
+            total = requests + args.warmup
+            if method == 'aget':
+                latencies, queries = asyncio.run(
+                    run_async(state, prepare, total))
+            else:
+                latencies, queries = run_sync(
+                    client, state, method, prepare, total)
+
+            key = f'{size}:{name}'
+            results[key] = summarize(latencies, queries, args.warmup)
+            report(key, results[key], baseline.get(key))
+
+            if name in OVERHEAD_SCENARIOS:
+                key = f'{size}:metrics overhead {name}'
+                overheads[key] = metrics_overhead(
+                    state, prepare, requests, args.warmup,
+                    args.metrics_repeats)
+                print(
+                    f'{key:<40} {statistics.median(overheads[key]):+.1%} p50'
+                    f'  ({overheads[key][0]:+.1%} to '
+                    f'{overheads[key][-1]:+.1%} over '
+                    f'{args.metrics_repeats} repeats)', flush=True)
+    return results, overheads
+
+
+def save(args, results, overheads):
+    with open(args.save_baseline, 'w') as baseline_file:
+        json.dump({
+            'vendor': connection.vendor,
+            'sizes': args.sizes,
+            'results': results,
+            'metrics_overhead': {
+                key: statistics.median(overhead)
+                for key, overhead in overheads.items()
+            },
+        }, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+        help='Recipes seeded per run.')
+    parser.add_argument(
+        '--requests', type=int, default=200,
+        help='Timed requests per route.')
+    parser.add_argument(
+        '--warmup', type=int, default=5,
+        help='Untimed requests per route before measuring.')
+    parser.add_argument(
+        '--only', nargs='+',
+        help='Only run routes whose name contains one of these.')
+    parser.add_argument('--baseline', help='Baseline JSON to compare with.')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25,
+        help='Allowed p95 slowdown against the baseline, as a fraction.')
+    parser.add_argument('--save-baseline', help='Write results as JSON.')
+    parser.add_argument(
+        '--max-metrics-overhead', type=float, default=0.02,
+        help='Allowed p50 slowdown from MetricsMiddleware, as a fraction.')
+    parser.add_argument(
+        '--metrics-repeats', type=int, default=5,
+        help='Interleaved runs timing MetricsMiddleware per route.')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(CACHES=NO_CACHE):
+            results, overheads = run(args, baseline)
+        if args.save_baseline:
+            save(args, results, overheads)
+        found = regressions(results, baseline, args.tolerance)
+        # Only an overhead seen in every repeat counts, not a noisy one.
+        found.extend(
+            f'{key}: {overhead[0]:+.1%} or more in every repeat, '
+            f'above {args.max_metrics_overhead:.0%}'
+            for key, overhead in overheads.items()
+            if overhead[0] > args.max_metrics_overhead
+        )
+        for line in found:
+            print(f'REGRESSION {line}', file=sys.stderr)
+    finally:
+        connections.close_all()
+        teardown_databases(old_config, verbosity=0)
+
+    if found:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,23 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 from core import models
+from core.pagination import EstimatedCountPaginator
 # Register your models here.
 
 
 class UserAdmin(BaseUserAdmin):
     ordering = ['id']
     list_display = ['email', 'name']
+    list_filter = ['is_staff', 'is_superuser', 'is_active']
+    # Whole address in any case, served by core_user_email_lower_idx.
+    search_fields = ['email']
+    search_help_text = _('Exact email address, in any case.')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         (
@@ -39,7 +49,51 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        # iexact compares UPPER() values, which the index does not hold.
+        queryset = queryset.alias(email_lower=Lower('email'))
+        return queryset.filter(email_lower=search_term.lower()), False
+
+
+class RecipeAdmin(admin.ModelAdmin):
+    ordering = ['-id']
+    list_display = ['title', 'user', 'time_minutes', 'price']
+    list_select_related = ['user']
+    raw_id_fields = ['user', 'tags']
+    # Postgres matches these through search_vector instead.
+    search_fields = ['title', 'description']
+    search_help_text = _('Words in the title or description.')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if connection.vendor != 'postgresql':
+            return super().get_search_results(
+                request, queryset, search_term)
+        # Uses the search_vector GIN index instead of ILIKE scans.
+        query = SearchQuery(
+            search_term, config='english', search_type='websearch')
+        return queryset.filter(search_vector=query), False
+
+
+class TagAdmin(admin.ModelAdmin):
+    ordering = ['name', 'id']
+    list_display = ['name', 'user']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
+    # Prefix match, served by core_tag_name_pattern_idx.
+    search_fields = ['name__startswith']
+    search_help_text = _('Start of the tag name.')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Recipe)
-admin.site.register(models.Tag)
+admin.site.register(models.Recipe, RecipeAdmin)
+admin.site.register(models.Tag, TagAdmin)
@@ -0,0 +1,173 @@
+"""
+Token authentication with cached token lookups
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from core.models import TokenUser
+
+CACHE_KEY_PREFIX = 'auth-token:'
+
+DEFAULTS = {
+    'TIMEOUT': 300,
+    'LOCAL_TIMEOUT': 5,
+    'LOCAL_MAX_ENTRIES': 10000,
+}
+
+
+def get_setting(name):
+    """Return an AUTH_TOKEN_CACHE setting, falling back to the default"""
+    return getattr(settings, 'AUTH_TOKEN_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class LocalTTLCache:
+    """Bounded in-process LRU whose entries expire after a TTL"""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = None
+_local_cache_lock = threading.Lock()
+
+
+def get_local_cache():
+    """Return the process LRU, built from the current settings"""
+    global _local_cache
+    if _local_cache is None:
+        with _local_cache_lock:
+            if _local_cache is None:
+                _local_cache = LocalTTLCache(
+                    get_setting('LOCAL_MAX_ENTRIES'),
+                    get_setting('LOCAL_TIMEOUT'),
+                )
+    return _local_cache
+
+
+def reset_local_cache():
+    """Drop the process LRU so the next lookup rebuilds it"""
+    global _local_cache
+    with _local_cache_lock:
+        _local_cache = None
+
+
+def invalidate_token(key):
+    """Drop a token from the local and shared caches"""
+    get_local_cache().delete(key)
+    cache.delete(CACHE_KEY_PREFIX + key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in TokenAuthentication that caches token to user lookups.
+
+    Lookups are served from a short-lived in-process LRU first, then from
+    the Django cache, and only then from the database. Entries are
+    invalidated by signals when the token is deleted or its user changes.
+    Other processes may keep a stale local entry for LOCAL_TIMEOUT seconds.
+
+    Only the user id and is_active are cached, and the authenticated user
+    is a TokenUser holding just those. Reading other fields such as email
+    raises FieldNotLoaded, so views needing them load the user by pk.
+    """
+
+    def authenticate_credentials(self, key):
+        local_cache = get_local_cache()
+        cached = local_cache.get(key)
+        if cached is None:
+            cached = cache.get(CACHE_KEY_PREFIX + key)
+            if cached is None:
+                user, token = super().authenticate_credentials(key)
+                cached = (user.pk, user.is_active)
+                cache.set(
+                    CACHE_KEY_PREFIX + key, cached, get_setting('TIMEOUT'))
+            local_cache.set(key, cached)
+
+        return self._check_cached(key, cached)
+
+    async def aauthenticate(self, request):
+        """Authenticate a plain Django request from an async view"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header.'))
+
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """Async counterpart of authenticate_credentials"""
+        local_cache = get_local_cache()
+        cached = local_cache.get(key)
+        if cached is None:
+            cached = await cache.aget(CACHE_KEY_PREFIX + key)
+            if cached is None:
+                try:
+                    token = await self.get_model().objects.select_related(
+                        'user').aget(key=key)
+                except self.get_model().DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+                cached = (token.user_id, token.user.is_active)
+                await cache.aset(
+                    CACHE_KEY_PREFIX + key, cached, get_setting('TIMEOUT'))
+            local_cache.set(key, cached)
+
+        return self._check_cached(key, cached)
+
+    def _check_cached(self, key, cached):
+        user_id, is_active = cached
+        if not is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+
+        user = TokenUser.from_db(
+            None, ['id', 'is_active'], [user_id, is_active])
+        token = self.get_model().from_db(
+            None, ['key', 'user_id'], [key, user_id])
+        return (user, token)
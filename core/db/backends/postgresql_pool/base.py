@@ -0,0 +1,110 @@
+"""
+PostgreSQL backend that checks connections out of a process-wide pool.
+
+Configure it per database with a POOL dict next to the usual settings:
+
+    'ENGINE': 'core.db.backends.postgresql_pool',
+    'POOL': {'MIN_SIZE': 2, 'MAX_SIZE': 20, 'TIMEOUT': 10,
+             'MAX_IDLE': 300, 'HEALTH_CHECK_AFTER': 30},
+
+Checkout pings connections idle for HEALTH_CHECK_AFTER seconds or more,
+or every time with 0. Keep CONN_MAX_AGE at 0 so Django hands
+connections back at the end of each request, under both WSGI and ASGI.
+The pool is topped up to MIN_SIZE then, not while a request waits.
+"""
+import logging
+
+from django.db.backends.postgresql import base
+from django.db.backends.base.base import NO_DB_ALIAS
+
+from core.db.backends.postgresql_pool.creation import DatabaseCreation
+from core.db.pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 0,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10.0,
+    'MAX_IDLE': 300.0,
+    'HEALTH_CHECK_AFTER': 30.0,
+}
+
+
+def close_connection(conn):
+    conn.close()
+
+
+def reset_connection(conn):
+    """Roll back leftovers so the next checkout starts clean"""
+    if conn.closed:
+        return False
+    if not conn.autocommit:
+        conn.rollback()
+    return True
+
+
+def ping_connection(conn):
+    if conn.closed:
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not conn.autocommit:
+        conn.rollback()
+    return True
+
+
+def pool_key(alias, conn_params):
+    return (alias, conn_params.get('dbname'), conn_params.get('host'))
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        config = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        return get_pool(pool_key(self.alias, conn_params), lambda: (
+            ConnectionPool(
+                close=close_connection,
+                reset=reset_connection,
+                ping=ping_connection,
+                min_size=config['MIN_SIZE'],
+                max_size=config['MAX_SIZE'],
+                timeout=config['TIMEOUT'],
+                max_idle=config['MAX_IDLE'],
+                health_check_after=config['HEALTH_CHECK_AFTER'],
+            )
+        ))
+
+    def get_new_connection(self, conn_params):
+        if self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(
+                conn_params)
+
+        pool = self.get_pool(conn_params)
+        conn = pool.checkout(connect)
+        # Reused connections skip the parent's connect, which is where the
+        # isolation level is normally recorded.
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = base.IsolationLevel(
+            options.get('isolation_level', base.IsolationLevel.READ_COMMITTED)
+        )
+        self._pool = pool
+        self._connect = connect
+        return conn
+
+    def _close(self):
+        pool = getattr(self, '_pool', None)
+        if self.connection is None or pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
+        try:
+            pool.fill(self._connect)
+        except Exception:
+            # The next checkout connects itself, so only report it.
+            logger.warning('Could not fill the connection pool',
+                           exc_info=True)
@@ -0,0 +1,214 @@
+"""
+Thread-safe database connection pool
+"""
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    """No connection became available before the checkout timeout"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of raw DB-API connections.
+
+    Backend specific behaviour is passed in as callables:
+    `close(conn)` closes a connection, `reset(conn)` prepares a returned
+    connection for reuse and returns False if it should be discarded, and
+    `ping(conn)` returns whether an idle connection still works.
+
+    Checkout pings connections idle for `health_check_after` seconds or
+    more. Ones used more recently skip the extra round trip, as a broken
+    one still fails its first query. Pass 0 to ping on every checkout.
+    """
+
+    def __init__(self, close, reset, ping, min_size=0, max_size=10,
+                 timeout=10.0, max_idle=300.0, health_check_after=30.0):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError('Pool sizes need 0 <= min_size <= max_size, >= 1')
+        self._close = close
+        self._reset = reset
+        self._ping = ping
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        self._idle = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'connects': 0,
+            'discards': 0,
+            'health_checks': 0,
+        }
+
+    def stats(self):
+        """Return counters plus the current pool occupancy"""
+        with self._cond:
+            return {
+                **self._stats,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+            }
+
+    def _evict_idle(self, now):
+        """Pop connections idle past max_idle, keeping min_size open"""
+        evicted = []
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            evicted.append(self._idle.popleft()[0])
+            self._size -= 1
+        return evicted
+
+    def _healthy(self, conn, last_used, now):
+        if now - last_used < self.health_check_after:
+            return True
+        with self._cond:
+            self._stats['health_checks'] += 1
+        try:
+            return self._ping(conn)
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._size -= 1
+            self._stats['discards'] += 1
+            self._cond.notify()
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+
+    def checkout(self, connect):
+        """Return a pooled connection, opening one with `connect` if needed"""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._stats['checkouts'] += 1
+
+        while True:
+            conn, last_used, waited, evicted = None, None, False, []
+            try:
+                with self._cond:
+                    while True:
+                        now = time.monotonic()
+                        evicted.extend(self._evict_idle(now))
+                        if self._idle:
+                            # Newest first, so rarely used extras age out.
+                            conn, last_used = self._idle.pop()
+                            break
+                        if self._size < self.max_size:
+                            self._size += 1
+                            break
+                        if not waited:
+                            self._stats['waits'] += 1
+                            waited = True
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeout(
+                                'No connection available within '
+                                f'{self.timeout}s (pool size {self.max_size})'
+                            )
+                        self._cond.wait(remaining)
+            finally:
+                for stale in evicted:
+                    self._close(stale)
+
+            if conn is None:
+                try:
+                    conn = connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['connects'] += 1
+                return conn
+
+            if self._healthy(conn, last_used, time.monotonic()):
+                return conn
+            self._discard(conn)
+
+    def fill(self, connect):
+        """Open idle connections until the pool holds min_size"""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._stats['connects'] += 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def release(self, conn):
+        """Give a connection back, discarding it if it cannot be reused"""
+        try:
+            reusable = self._reset(conn)
+        except Exception:
+            reusable = False
+        if not reusable:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """Return the process-wide pool for key, creating it with factory"""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def pool_stats():
+    """Return stats of every pool in this process keyed by pool key"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {key: pool.stats() for key, pool in pools}
+
+
+def close_pools(predicate=lambda key: True):
+    """Close idle connections of the pools whose key matches"""
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items() if predicate(key)]
+    for pool in pools:
+        pool.close_all()
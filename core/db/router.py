@@ -0,0 +1,257 @@
+"""
+Route reads of safe requests to read replicas.
+
+Replicas are extra DATABASES aliases listed in DATABASE_REPLICAS:
+
+    DATABASE_REPLICAS = {
+        'ALIASES': ['replica1', 'replica2'],
+        'PIN_SECONDS': 5,
+        'MAX_LAG_SECONDS': 10,
+        'CHECK_INTERVAL': 5,
+        'PRIMARY_APPS': ['authtoken'],
+    }
+
+Reads go to a replica only inside a GET, HEAD or OPTIONS request handled
+by ReplicaRoutingMiddleware. Once a request writes, the rest of it reads
+from the primary, and so do the next requests with the same credentials
+for PIN_SECONDS. Use a shared cache so the pin holds across processes.
+
+Replica health and lag are checked every CHECK_INTERVAL by a background
+thread per process, never on the request path.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+REPLICA_DEFAULTS = {
+    'ALIASES': [],
+    'PIN_SECONDS': 5,
+    'MAX_LAG_SECONDS': 10,
+    'CHECK_INTERVAL': 5,
+    'PRIMARY_APPS': ['authtoken'],
+}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY_PREFIX = 'db-pin:'
+logger = logging.getLogger(__name__)
+
+LAG_SQL = (
+    'SELECT CASE WHEN pg_is_in_recovery() THEN COALESCE(EXTRACT(EPOCH '
+    'FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END'
+)
+
+current_routing = ContextVar('current_routing', default=None)
+
+
+def get_config():
+    return {**REPLICA_DEFAULTS, **getattr(settings, 'DATABASE_REPLICAS', {})}
+
+
+class RequestRouting:
+    """Routing state of one request"""
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.used_replica = False
+
+
+def used_replica():
+    """Return whether the current request read from a replica"""
+    routing = current_routing.get()
+    return routing is not None and routing.used_replica
+
+
+class ReplicaSelector:
+    """
+    Pick a healthy replica whose lag is within bounds.
+
+    Statuses come from a daemon thread started on first use. Until its
+    first round, or if it stops reporting, reads use the primary.
+    """
+    # Statuses older than this many intervals are not trusted.
+    stale_intervals = 3
+
+    def __init__(self, aliases, max_lag, check_interval):
+        self.aliases = list(aliases)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.checked = threading.Event()
+        self._status = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def check(self, alias):
+        """Return (healthy, lag in seconds) of a replica"""
+        connection = connections[alias]
+        sql = LAG_SQL if connection.vendor == 'postgresql' else 'SELECT 0'
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+                (lag,) = cursor.fetchone()
+        except DatabaseError:
+            connection.close()
+            return False, None
+        return True, float(lag or 0)
+
+    def refresh(self):
+        """Check every replica and store the results"""
+        for alias in self.aliases:
+            status = (time.monotonic(), *self.check(alias))
+            with self._lock:
+                self._status[alias] = status
+        self.checked.set()
+
+    def run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Replica health check failed')
+            time.sleep(self.check_interval)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self.run, name='replica-health', daemon=True)
+        self._thread.start()
+
+    def usable(self, alias):
+        with self._lock:
+            status = self._status.get(alias)
+        if status is None:
+            return False
+        checked_at, healthy, lag = status
+        age = time.monotonic() - checked_at
+        return (
+            healthy
+            and lag <= self.max_lag
+            and age <= self.check_interval * self.stale_intervals
+        )
+
+    def choose(self):
+        """Return a usable replica alias, or None to use the primary"""
+        if self._thread is None:
+            self.start()
+        candidates = [alias for alias in self.aliases if self.usable(alias)]
+        return random.choice(candidates) if candidates else None
+
+
+class ReplicaRouter:
+    """Send safe request reads to replicas and everything else to default"""
+
+    def __init__(self):
+        config = get_config()
+        self.replicas = list(config['ALIASES'])
+        self.primary_apps = set(config['PRIMARY_APPS'])
+        self.selector = ReplicaSelector(
+            self.replicas,
+            config['MAX_LAG_SECONDS'],
+            config['CHECK_INTERVAL'],
+        ) if self.replicas else None
+
+    def db_for_read(self, model, **hints):
+        if self.selector is None:
+            return None
+        routing = current_routing.get()
+        if (
+            routing is None
+            or routing.pinned
+            or model._meta.app_label in self.primary_apps
+        ):
+            return DEFAULT_DB_ALIAS
+        alias = self.selector.choose()
+        if alias is None:
+            return DEFAULT_DB_ALIAS
+        routing.used_replica = True
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if self.selector is None:
+            return None
+        routing = current_routing.get()
+        if routing is not None:
+            routing.pinned = routing.wrote = True
+        # Explicit, as Django would otherwise write replica-loaded
+        # instances back to the replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self.replicas:
+            return False
+        return None
+
+
+def pin_key(request):
+    """Return the pin cache key for the request's credentials"""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return PIN_KEY_PREFIX + digest
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Mark safe requests as replica readable and pin writers to primary.
+
+    The middleware removes itself when no replicas are configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config['ALIASES']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = config['PIN_SECONDS']
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = pin_key(request)
+        routing = RequestRouting(
+            request.method not in SAFE_METHODS
+            or (key is not None and cache.get(key) is not None)
+        )
+        token = current_routing.set(routing)
+        try:
+            return self.get_response(request)
+        finally:
+            current_routing.reset(token)
+            if routing.wrote and key is not None:
+                cache.set(key, 1, self.pin_seconds)
+
+    async def __acall__(self, request):
+        key = pin_key(request)
+        routing = RequestRouting(
+            request.method not in SAFE_METHODS
+            or (key is not None and await cache.aget(key) is not None)
+        )
+        token = current_routing.set(routing)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+            if routing.wrote and key is not None:
+                await cache.aset(key, 1, self.pin_seconds)
@@ -0,0 +1,35 @@
+"""
+Django command to build the OpenAPI schema artifact
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import get_config, write_artifact
+
+
+class Command(BaseCommand):
+    """Django command to prebuild the OpenAPI schema"""
+
+    help = 'Generate the OpenAPI schema artifact served by /api/schema/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Artifact path. Defaults to OPENAPI_SCHEMA ARTIFACT_PATH.',
+        )
+        parser.add_argument(
+            '--schema-version',
+            help='Deployment version. Defaults to OPENAPI_SCHEMA VERSION.',
+        )
+
+    def handle(self, *args, **options):
+        config = get_config()
+        path = options['output'] or config['ARTIFACT_PATH']
+        if not path:
+            raise CommandError(
+                'Pass --output or set OPENAPI_SCHEMA ARTIFACT_PATH.')
+        version = options['schema_version'] or config['VERSION']
+        data = write_artifact(path, version)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(data["paths"])} paths to {path} '
+            f'for version {version or "(any)"}'
+        ))
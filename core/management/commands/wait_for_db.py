@@ -1,12 +1,86 @@
 """
 Django command to wait for database connection
 """
+import random
+import time
 
-from django.core.management.base import baseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import OperationalError
 
 
-class Command(baseCommand):
+class Command(BaseCommand):
     """ Django command to wait for database"""
 
+    help = 'Wait until the databases accept connections, then warm them up.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Database alias to wait for. Defaults to all configured.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60.0,
+            help='Give up after this many seconds.',
+        )
+        parser.add_argument(
+            '--initial-delay',
+            type=float,
+            default=0.5,
+            help='First backoff delay in seconds.',
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=5.0,
+            help='Upper bound for a single backoff delay in seconds.',
+        )
+
+    def _connect(self, alias):
+        """Open the connection and check it answers a query"""
+        connection = connections[alias]
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
     def handle(self, *args, **options):
-        pass
+        aliases = options['databases'] or list(connections)
+        timeout = options['timeout']
+        delay = options['initial_delay']
+        start = time.monotonic()
+        attempts = 0
+
+        self.stdout.write('Waiting for database...')
+        pending = list(aliases)
+        while pending:
+            attempts += 1
+            try:
+                for alias in list(pending):
+                    self._connect(alias)
+                    pending.remove(alias)
+            except OperationalError as exc:
+                connections[pending[0]].close()
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database {pending[0]!r} unavailable after '
+                        f'{attempts} attempts: {exc}'
+                    )
+                # Full jitter keeps a fleet of containers from retrying
+                # in lockstep against the same server.
+                sleep = min(random.uniform(0, delay), remaining)
+                self.stdout.write(
+                    f'Database unavailable, retrying in {sleep:.2f}s...')
+                time.sleep(sleep)
+                delay = min(delay * 2, options['max_delay'])
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Database available after {elapsed:.2f}s '
+            f'({attempts} attempts, {len(aliases)} connections warmed)'
+        ))
@@ -0,0 +1,163 @@
+"""
+In-process request metrics rendered in the Prometheus text format
+"""
+import bisect
+import threading
+
+from core.db.pool import pool_stats
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+REQUEST_LABELS = ('view', 'action', 'method')
+
+
+def format_labels(names, values):
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', r'\\').replace(
+            '"', r'\"').replace('\n', r'\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label values"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in sorted(values):
+            yield self.name, format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    """Bucketed observations per label values"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [
+                    [0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = [
+                (label_values, list(counts), total)
+                for label_values, (counts, total) in self._series.items()
+            ]
+        names = self.labels + ('le',)
+        for label_values, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket',
+                    format_labels(
+                        names, label_values + (format_value(bound),)),
+                    cumulative,
+                )
+            labels = format_labels(self.labels, label_values)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+REQUESTS = Counter(
+    'http_requests_total',
+    'Requests per view, action, method and status.',
+    REQUEST_LABELS + ('status',),
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Time spent below the metrics middleware per request.',
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent executing SQL per request.',
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'SQL queries executed per request.',
+    REQUEST_LABELS,
+    QUERY_BUCKETS,
+)
+REGISTRY = [REQUESTS, REQUEST_DURATION, DB_DURATION, DB_QUERIES]
+
+
+def observe_request(labels, status, duration, db_duration, queries):
+    REQUESTS.inc(labels + (status,))
+    REQUEST_DURATION.observe(labels, duration)
+    DB_DURATION.observe(labels, db_duration)
+    DB_QUERIES.observe(labels, queries)
+
+
+def render_pool_stats():
+    """Yield gauges and counters for the connection pools"""
+    stats = sorted(pool_stats().items())
+    if not stats:
+        return
+    gauges = ('size', 'idle', 'in_use')
+    counters = sorted(set(stats[0][1]) - set(gauges))
+    metrics = [
+        (name, f'db_pool_{name}_connections', 'gauge') for name in gauges
+    ] + [
+        (name, f'db_pool_{name}_total', 'counter') for name in counters
+    ]
+    for name, metric, kind in metrics:
+        yield f'# HELP {metric} Connection pool {name.replace("_", " ")}.'
+        yield f'# TYPE {metric} {kind}'
+        for key, values in stats:
+            # Pools are keyed by (alias, dbname, host).
+            labels = format_labels(('alias',), key[:1])
+            yield f'{metric}{labels} {values[name]}'
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(
+            f'{name}{labels} {format_value(value)}'
+            for name, labels, value in metric.samples()
+        )
+    lines.extend(render_pool_stats())
+    return '\n'.join(lines) + '\n'
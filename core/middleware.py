@@ -0,0 +1,158 @@
+"""
+Middleware recording per-view latency, SQL time and query counts
+"""
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core import metrics
+
+# Set per request; sync_to_async copies it into the threads async views
+# run their queries in.
+current_timer = ContextVar('current_timer', default=None)
+
+
+class QueryTimer:
+    """Query count and SQL time of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper adding each query to the request's QueryTimer"""
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - start
+        timer.count += 1
+
+
+def install_query_recorder(connection):
+    # Called for every new connection by core.signals. First in the list
+    # is innermost, and execute_wrapper() blocks that pop from the end
+    # leave it alone.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class MetricsMiddleware:
+    """
+    Time every request and its SQL, labelled by URL name and action.
+
+    Observations feed the histograms in core.metrics, and the totals
+    are sent back in a Server-Timing header unless METRICS turns it off.
+    Put it first in MIDDLEWARE so the whole stack is timed.
+
+    Streaming responses are observed once their content is consumed, so
+    their metrics include the queries run while streaming. Their
+    Server-Timing header only covers the work before the first chunk.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'METRICS', {})
+        self.server_timing = config.get('SERVER_TIMING', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, start)
+
+    async def __acall__(self, request):
+        timer, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, start)
+
+    def start(self):
+        timer = QueryTimer()
+        return timer, current_timer.set(timer), time.perf_counter()
+
+    def finish(self, request, response, timer, start):
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        labels = (
+            match.view_name if match else '',
+            getattr(request, '_metrics_action', ''),
+            request.method,
+        )
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'total;dur={duration * 1000:.1f}, '
+                f'db;dur={timer.duration * 1000:.1f};'
+                f'desc="{timer.count} queries"'
+            )
+
+        if not response.streaming:
+            metrics.observe_request(
+                labels, response.status_code, duration,
+                timer.duration, timer.count)
+        elif response.is_async:
+            response.streaming_content = self.atimed_stream(
+                response.streaming_content, response.status_code,
+                labels, timer, start)
+        else:
+            response.streaming_content = self.timed_stream(
+                response.streaming_content, response.status_code,
+                labels, timer, start)
+        return response
+
+    def timed_stream(self, content, status, labels, timer, start):
+        """Yield the content with its queries recorded, then observe"""
+        chunks = iter(content)
+        try:
+            while True:
+                # The server iterates outside the request's context.
+                token = current_timer.set(timer)
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    current_timer.reset(token)
+                yield chunk
+        finally:
+            metrics.observe_request(
+                labels, status, time.perf_counter() - start,
+                timer.duration, timer.count)
+
+    async def atimed_stream(self, content, status, labels, timer, start):
+        chunks = aiter(content)
+        try:
+            while True:
+                token = current_timer.set(timer)
+                try:
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    current_timer.reset(token)
+                yield chunk
+        finally:
+            metrics.observe_request(
+                labels, status, time.perf_counter() - start,
+                timer.duration, timer.count)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Viewsets map HTTP methods to actions such as list or retrieve.
+        actions = getattr(view_func, 'actions', None) or {}
+        request._metrics_action = actions.get(request.method.lower(), '')
@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Fold tags sharing (user, name) into the oldest one."""
+    Tag = apps.get_model('core', 'Tag')
+    Recipe = apps.get_model('core', 'Recipe')
+    through = Recipe.tags.through
+
+    duplicates = (
+        Tag.objects.values('user_id', 'name')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates:
+        extra_ids = list(
+            Tag.objects.filter(user_id=dup['user_id'], name=dup['name'])
+            .exclude(id=dup['keep_id'])
+            .values_list('id', flat=True)
+        )
+        recipe_ids = set(
+            through.objects.filter(tag_id__in=extra_ids)
+            .values_list('recipe_id', flat=True)
+        )
+        through.objects.bulk_create(
+            [through(recipe_id=recipe_id, tag_id=dup['keep_id'])
+             for recipe_id in recipe_ids],
+            ignore_conflicts=True,
+        )
+        Tag.objects.filter(id__in=extra_ids).delete()
+
+    if schema_editor.connection.vendor == 'postgresql':
+        # Run the deferred foreign key checks of the deleted links now.
+        # Postgres refuses to ALTER a table with checks still pending.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_tag_recipe_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='core_recipe_user_id_desc_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='core_tag_user_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-17 10:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.db import migrations
+
+CREATE_TRIGGER = """
+CREATE FUNCTION core_recipe_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english',
+                              coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english',
+                              coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON core_recipe
+    FOR EACH ROW EXECUTE FUNCTION core_recipe_search_vector_update();
+
+UPDATE core_recipe SET title = title;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS core_recipe_search_vector_trigger ON core_recipe;
+DROP FUNCTION IF EXISTS core_recipe_search_vector_update();
+"""
+
+
+def run_on_postgres(sql):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_recipe_tag_user_indexes'),
+    ]
+
+    operations = [
+        BtreeGinExtension(),
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_on_postgres(CREATE_TRIGGER),
+            run_on_postgres(DROP_TRIGGER),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['user', 'search_vector'], name='core_recipe_user_search_gin'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['name'], name='core_tag_name_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Only changes to the indexed columns need the tsvector recomputed.
+REPLACE_TRIGGER = """
+DROP TRIGGER IF EXISTS core_recipe_search_vector_trigger ON core_recipe;
+CREATE TRIGGER core_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON core_recipe
+    FOR EACH ROW EXECUTE FUNCTION core_recipe_search_vector_update();
+"""
+
+RESTORE_TRIGGER = """
+DROP TRIGGER IF EXISTS core_recipe_search_vector_trigger ON core_recipe;
+CREATE TRIGGER core_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON core_recipe
+    FOR EACH ROW EXECUTE FUNCTION core_recipe_search_vector_update();
+"""
+
+
+def run_on_postgres(sql):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tag_name_pattern_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgres(REPLACE_TRIGGER),
+            run_on_postgres(RESTORE_TRIGGER),
+        ),
+    ]
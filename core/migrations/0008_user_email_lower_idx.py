@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 00:52
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_search_vector_trigger_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='core_user_email_lower_idx'),
+        ),
+    ]
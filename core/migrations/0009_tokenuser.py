@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 00:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_user_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('core.user',),
+        ),
+    ]
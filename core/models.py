@@ -1,5 +1,8 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin)
 
@@ -40,6 +43,36 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    class Meta:
+        indexes = [
+            # Serves case insensitive email lookups, as in the admin.
+            models.Index(Lower('email'), name='core_user_email_lower_idx'),
+        ]
+
+
+class FieldNotLoaded(Exception):
+    """A field that a partially loaded instance does not hold was read"""
+
+
+class TokenUser(User):
+    """
+    User as cached by token authentication, holding only id and is_active.
+
+    Reading any other field raises FieldNotLoaded instead of running a
+    query per field. Views needing more load the user by pk.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        raise FieldNotLoaded(
+            f'{", ".join(fields or ["fields"])} not loaded for token user '
+            f'{self.pk}, load the user by pk instead.')
+
+    def __str__(self) -> str:
+        return f'Token user {self.pk}'
+
 
 class Recipe(models.Model):
     """Recipe Object"""
@@ -54,6 +87,20 @@ class Recipe(models.Model):
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
+    # Maintained by a database trigger from title and description.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='core_recipe_user_id_desc_idx',
+            ),
+            GinIndex(
+                fields=['user', 'search_vector'],
+                name='core_recipe_user_search_gin',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -67,5 +114,21 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_tag_user_name_uniq',
+            ),
+        ]
+        indexes = [
+            # Serves prefix searches on name across users, as in the admin.
+            models.Index(
+                fields=['name'],
+                name='core_tag_name_pattern_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.name
@@ -0,0 +1,56 @@
+"""
+Paginators that estimate the count of large tables instead of counting
+"""
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using Postgres planner estimates above a threshold.
+
+    Unfiltered querysets read pg_class.reltuples, filtered ones the row
+    estimate of EXPLAIN. Exact COUNT(*) is used below the threshold, on
+    other databases and for anything that is not a queryset.
+    """
+    estimate_threshold = 100000
+
+    def __init__(self, *args, estimate_threshold=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if estimate_threshold is not None:
+            self.estimate_threshold = estimate_threshold
+        self.is_estimate = False
+
+    def get_estimate(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or connections[queryset.db].vendor != 'postgresql':
+            return None
+        with connections[queryset.db].cursor() as cursor:
+            if not query.where and not query.distinct and not query.is_sliced:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                # -1 until the table is first analyzed.
+                return row[0] if row and row[0] >= 0 else None
+
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        estimate = self.get_estimate()
+        if estimate is not None and estimate > self.estimate_threshold:
+            self.is_estimate = True
+            return estimate
+        return super().count
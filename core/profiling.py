@@ -0,0 +1,172 @@
+"""
+Sampled profiling of requests: slow SQL logging and cProfile dumps
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+import traceback
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+current_sample = ContextVar('current_sample', default=None)
+
+PROFILING_DEFAULTS = {
+    'ENABLED': False,
+    # URL prefix to the fraction of its requests that are sampled.
+    'SAMPLE_RATES': {},
+    'SLOW_QUERY_MS': 100,
+    'PROFILE_DIR': None,
+}
+# Frames of these modules are skipped when looking for the query caller.
+INTERNAL_FILES = (
+    __file__,
+    os.path.join(os.path.dirname(__file__), 'middleware.py'),
+)
+
+
+def get_config():
+    return {**PROFILING_DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+class Sample:
+    """Slow queries seen while handling one sampled request"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.slow_queries = []
+
+
+def calling_frame():
+    """Return the innermost project frame that issued a query"""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if (
+            filename.startswith(base_dir)
+            and 'site-packages' not in filename
+            and filename not in INTERNAL_FILES
+        ):
+            path = os.path.relpath(filename, base_dir)
+            return f'{path}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """execute_wrapper keeping queries slower than the sample threshold"""
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if duration >= sample.threshold:
+            sample.slow_queries.append((duration, sql, calling_frame()))
+
+
+def install_slow_query_logger(connection):
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_query)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a random fraction of requests under configured URL prefixes.
+
+    Sampled requests log every query slower than SLOW_QUERY_MS with the
+    view, user id and the application frame that ran it. With PROFILE_DIR
+    set, sampled sync requests are also run under cProfile and dumped
+    there. The middleware removes itself unless PROFILING is enabled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config['ENABLED'] or not config['SAMPLE_RATES']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Longest prefix first, so /api/recipe/ can override /api/.
+        self.sample_rates = sorted(
+            config['SAMPLE_RATES'].items(), key=lambda item: -len(item[0]))
+        self.threshold = config['SLOW_QUERY_MS'] / 1000
+        self.profile_dir = config['PROFILE_DIR']
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def should_sample(self, request):
+        for prefix, rate in self.sample_rates:
+            if request.path.startswith(prefix):
+                return rate > 0 and random.random() < rate
+        return False
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_sample(request):
+            return self.get_response(request)
+
+        token = self.start()
+        profile = cProfile.Profile() if self.profile_dir else None
+        try:
+            if profile is None:
+                response = self.get_response(request)
+            else:
+                response = profile.runcall(self.get_response, request)
+        finally:
+            sample = current_sample.get()
+            current_sample.reset(token)
+        self.finish(request, sample, profile)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_sample(request):
+            return await self.get_response(request)
+
+        # cProfile only sees one thread, so async requests just get the
+        # slow query log.
+        token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            sample = current_sample.get()
+            current_sample.reset(token)
+        self.finish(request, sample, None)
+        return response
+
+    def start(self):
+        for connection in connections.all():
+            install_slow_query_logger(connection)
+        return current_sample.set(Sample(self.threshold))
+
+    def finish(self, request, sample, profile):
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+        if sample.slow_queries:
+            user_id = getattr(getattr(request, 'user', None), 'pk', None)
+            for duration, sql, frame in sample.slow_queries:
+                logger.warning(
+                    'Slow query %.1fms in %s for user %s at %s: %s',
+                    duration * 1000, view, user_id, frame, sql,
+                )
+        if profile is not None:
+            self.dump(request, view, profile)
+
+    def dump(self, request, view, profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = re.sub(r'[^\w.-]+', '-', f'{request.method}-{view}')
+        path = os.path.join(
+            self.profile_dir, f'{time.time():.6f}-{name}.prof')
+        profile.dump_stats(path)
+        logger.info('Wrote profile of %s %s to %s',
+                    request.method, request.path, path)
@@ -0,0 +1,75 @@
+"""
+JSON renderer backed by orjson, with the DRF renderer as fallback
+"""
+import math
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON_OPTIONS = 0 if orjson is None else (
+    # Datetimes go through the DRF encoder, which writes UTC as 'Z'.
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+)
+
+
+def has_non_finite(data):
+    """Return whether data holds a NaN or infinite float"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value)
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Render compact JSON with orjson, with the same values as JSONRenderer.
+
+    Output matches JSONRenderer byte for byte except for floats in
+    exponent notation, which orjson writes in shortest form: 1e16 and
+    1e-7 rather than 1e+16 and 1e-07. Both parse to the same number.
+
+    Indented, ASCII-only and non-compact output, and values orjson
+    cannot encode, are left to the stdlib based JSONRenderer. So is
+    data with NaN or infinity, which orjson would write as null, so
+    that it raises ValueError like the strict JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=JSONEncoder().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        # orjson writes non-finite floats as null, so only output with
+        # a null can hide one.
+        if b'null' in ret and has_non_finite(data):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer keeps the output a JS subset.
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,122 @@
+"""
+Prebuilt OpenAPI schema, generated once per deployment.
+
+Build the artifact into the image with `manage.py build_schema`, or let
+each process generate it on startup. Either way the schema is rendered
+to YAML and JSON once, gzipped, and served from memory:
+
+    OPENAPI_SCHEMA = {
+        'ARTIFACT_PATH': '/app/openapi.json',
+        'VERSION': 'deployment identifier, such as the git commit',
+    }
+
+An artifact built for another VERSION is ignored and the schema is
+generated again.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from drf_spectacular.renderers import (
+    OpenApiJsonRenderer,
+    OpenApiYamlRenderer,
+)
+from drf_spectacular.settings import spectacular_settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DEFAULTS = {
+    'ARTIFACT_PATH': None,
+    'VERSION': None,
+}
+RENDERERS = {
+    renderer.format: renderer()
+    for renderer in (OpenApiYamlRenderer, OpenApiJsonRenderer)
+}
+
+_lock = threading.Lock()
+_schema = None
+
+
+def get_config():
+    return {**SCHEMA_DEFAULTS, **getattr(settings, 'OPENAPI_SCHEMA', {})}
+
+
+class RenderedSchema:
+    """One format of the schema, plain and gzipped"""
+
+    def __init__(self, content, version):
+        self.content = content
+        self.gzipped = gzip.compress(content, mtime=0)
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        # Weak, as it is shared by the plain and gzipped encodings.
+        self.etag = f'W/"{version or "schema"}-{digest}"'
+
+
+class PrebuiltSchema:
+    """The schema of one deployment rendered in every served format"""
+
+    def __init__(self, data, version):
+        self.data = data
+        self.version = version
+        self.formats = {
+            name: RenderedSchema(
+                renderer.render(data, renderer.media_type), version)
+            for name, renderer in RENDERERS.items()
+        }
+
+
+def generate_schema():
+    """Return the public schema as plain JSON data"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    # Round trip through the renderer to resolve lazy strings and such.
+    content = RENDERERS['json'].render(schema, 'application/json')
+    return json.loads(content)
+
+
+def write_artifact(path, version):
+    data = generate_schema()
+    with open(path, 'w') as artifact:
+        json.dump({'version': version, 'schema': data}, artifact)
+    return data
+
+
+def read_artifact(path, version):
+    """Return the schema of the artifact, or None if unusable"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as artifact:
+        content = json.load(artifact)
+    if version is not None and content.get('version') != version:
+        logger.warning(
+            'Ignoring OpenAPI artifact %s built for version %s, not %s',
+            path, content.get('version'), version)
+        return None
+    return content['schema']
+
+
+def get_schema():
+    """Return the PrebuiltSchema, loading or generating it once"""
+    global _schema
+    if _schema is not None:
+        return _schema
+    with _lock:
+        if _schema is None:
+            config = get_config()
+            version = config['VERSION']
+            data = read_artifact(config['ARTIFACT_PATH'], version)
+            if data is None:
+                data = generate_schema()
+            _schema = PrebuiltSchema(data, version)
+    return _schema
+
+
+def clear_schema():
+    global _schema
+    with _lock:
+        _schema = None
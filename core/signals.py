@@ -0,0 +1,43 @@
+"""
+Signal handlers for core models
+"""
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token, reset_local_cache
+from core.middleware import install_query_recorder
+from core.profiling import install_slow_query_logger
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Forget a token as soon as it is deleted"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Forget cached tokens when a user is changed or deactivated"""
+    if created:
+        return
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    for key in keys:
+        invalidate_token(key)
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    """Let the metrics and profiling middleware see new connections"""
+    install_query_recorder(connection)
+    install_slow_query_logger(connection)
+
+
+@receiver(setting_changed)
+def rebuild_local_token_cache(sender, setting, **kwargs):
+    """Apply changed AUTH_TOKEN_CACHE sizes and timeouts"""
+    if setting == 'AUTH_TOKEN_CACHE':
+        reset_local_cache()
@@ -2,11 +2,19 @@
 Tests for Django admin modification.
 """
 
-from django.test import TestCase
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.test import Client
 
+from core.models import Recipe, Tag
+
 
 class AdminSiteTests(TestCase):
     """Tests for Django Admin."""
@@ -42,3 +50,86 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_users_search_exact_email(self):
+        url = reverse('admin:core_user_changelist')
+        res = self.client.get(url, {'q': 'USER@example.com'})
+
+        self.assertEqual(
+            list(res.context['cl'].result_list), [self.user])
+
+    def test_recipes_list(self):
+        Recipe.objects.create(
+            user=self.user, title='Sample soup', time_minutes=5,
+            price=Decimal('4.50'))
+        url = reverse('admin:core_recipe_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+
+        self.assertContains(res, 'Sample soup')
+        self.assertContains(res, self.user.email)
+        counts = [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        self.assertEqual(len(counts), 1)
+
+    def test_recipes_search(self):
+        Recipe.objects.create(
+            user=self.user, title='Sample soup', time_minutes=5,
+            price=Decimal('4.50'))
+        Recipe.objects.create(
+            user=self.user, title='Pancakes', time_minutes=5,
+            price=Decimal('4.50'), description='Served with soup')
+        Recipe.objects.create(
+            user=self.user, title='Waffles', time_minutes=5,
+            price=Decimal('4.50'))
+        url = reverse('admin:core_recipe_changelist')
+        res = self.client.get(url, {'q': 'soup'})
+
+        self.assertContains(res, 'Sample soup')
+        self.assertContains(res, 'Pancakes')
+        self.assertNotContains(res, 'Waffles')
+
+    def test_tags_search_prefix(self):
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+        url = reverse('admin:core_tag_changelist')
+        res = self.client.get(url, {'q': 'Veg'})
+
+        self.assertContains(res, 'Vegan')
+        self.assertNotContains(res, 'Dessert')
+
+    def test_edit_recipe_page(self):
+        recipe = Recipe.objects.create(
+            user=self.user, title='Sample soup', time_minutes=5,
+            price=Decimal('4.50'))
+        url = reverse('admin:core_recipe_change', args=[recipe.id])
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Plans checked on Postgres')
+class AdminSearchPlanTests(TestCase):
+    """Test admin searches use indexes"""
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        # Test tables are tiny, so stop the planner preferring seq scans.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def search_plan(self, model, term):
+        model_admin = site._registry[model]
+        queryset, _ = model_admin.get_search_results(
+            self.request, model.objects.all(), term)
+        return queryset.explain()
+
+    def test_user_email_search_uses_index(self):
+        plan = self.search_plan(get_user_model(), 'USER@example.com')
+
+        self.assertIn('Index', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_tag_prefix_search_uses_pattern_index(self):
+        plan = self.search_plan(Tag, 'Veg')
+
+        self.assertIn('core_tag_name_pattern_idx', plan)
@@ -0,0 +1,168 @@
+"""
+Tests for cached token authentication.
+"""
+import pickle
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    CACHE_KEY_PREFIX,
+    CachedTokenAuthentication,
+    LocalTTLCache,
+    get_local_cache,
+)
+from core.models import FieldNotLoaded, TokenUser
+
+ME_URL = reverse('user:me')
+
+
+class LocalTTLCacheTests(TestCase):
+    """Tests for the in-process LRU"""
+
+    def test_evicts_least_recently_used(self):
+        lru = LocalTTLCache(max_entries=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_entries_expire(self):
+        lru = LocalTTLCache(max_entries=2, timeout=-1)
+        lru.set('a', 1)
+
+        self.assertIsNone(lru.get('a'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Tests for token lookups served from cache"""
+
+    def setUp(self):
+        get_local_cache().clear()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def assertNoTokenQueries(self, ctx):
+        tables = [Token._meta.db_table, 'authtoken_token']
+        for query in ctx.captured_queries:
+            for table in tables:
+                self.assertNotIn(table, query['sql'])
+
+    def test_repeat_request_skips_token_query(self):
+        """Test a second request does not query the token table"""
+        self.client.get(ME_URL)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        # Only the me view loads the user row.
+        self.assertEqual(len(ctx), 1)
+        self.assertNoTokenQueries(ctx)
+
+    def test_shared_cache_used_when_local_empty(self):
+        """Test a cold process reads the token from the Django cache"""
+        self.client.get(ME_URL)
+        get_local_cache().clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNoTokenQueries(ctx)
+
+    def test_cache_holds_only_id_and_active_flag(self):
+        """Test no password hash or profile fields reach the cache"""
+        self.client.get(ME_URL)
+
+        cached = cache.get(CACHE_KEY_PREFIX + self.token.key)
+
+        self.assertEqual(cached, (self.user.id, True))
+        self.assertNotIn(
+            self.user.password.encode(), pickle.dumps(cached))
+
+    def test_user_is_partial(self):
+        """Test unloaded user fields fail loudly instead of querying"""
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = auth.authenticate_credentials(self.token.key)
+            self.assertIsInstance(user, TokenUser)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_authenticated)
+            with self.assertRaises(FieldNotLoaded):
+                user.email
+            self.assertEqual(str(user), f'Token user {self.user.pk}')
+
+    @override_settings(AUTH_TOKEN_CACHE={'LOCAL_TIMEOUT': 42})
+    def test_local_cache_follows_settings(self):
+        self.assertEqual(get_local_cache().timeout, 42)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates the cached entry"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates the cached entry"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_through_api_refreshes_user(self):
+        """Test changes made through the me endpoint are seen next request"""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'Updated name'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'Updated name')
+
+    def test_update_through_admin_refreshes_user(self):
+        """Test changes made through the admin are seen next request"""
+        self.client.get(ME_URL)
+        admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        admin_client = APIClient()
+        admin_client.force_login(admin_user)
+        url = reverse('admin:core_user_change', args=[self.user.id])
+
+        admin_client.post(url, {
+            'email': self.user.email,
+            'is_active': '',
+        })
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
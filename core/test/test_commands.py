@@ -1,23 +1,132 @@
-# """
-# Test custom Django management commands.
-# """
-# from unittest.mock import patch
+"""
+Test custom Django management commands.
+"""
+from io import StringIO
+from unittest.mock import patch
 
-# from psycopg2 import OperationalError as Psycopg2OpError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
 
-# from django.core.management import call_command
-# from django.db.utils import OperationalError
-# from django.test import SimpleTestCase
 
+class StandInCursor:
+    """Cursor for StandInConnection"""
 
-# @patch('core.management.commands.wait_for_db.Command.check')
-# class CommandTests(SimpleTestCase):
-#     """Test commands."""
+    def __init__(self, connection):
+        self.connection = connection
 
-#     def test_wait_for_db_ready(self, patched_check):
-#         """Test waiting for database if database ready."""
-#         patched_check.return_value = True
+    def __enter__(self):
+        return self
 
-#         call_command('wait_for_db')
+    def __exit__(self, *exc_info):
+        return False
 
-#         patched_check.assert_called_once_with(databases=['default'])
+    def execute(self, sql):
+        self.connection.queries.append(sql)
+
+    def fetchone(self):
+        return (1,)
+
+
+class StandInConnection:
+    """Database stand-in that refuses the first `failures` connects"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = 0
+        self.queries = []
+
+    def ensure_connection(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise OperationalError('connection refused')
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def close(self):
+        pass
+
+
+@patch('core.management.commands.wait_for_db.time.sleep')
+class CommandTests(SimpleTestCase):
+    """Test commands."""
+
+    def call(self, stand_ins, **options):
+        out = StringIO()
+        with patch(
+            'core.management.commands.wait_for_db.connections', stand_ins
+        ):
+            call_command('wait_for_db', stdout=out, **options)
+        return out.getvalue()
+
+    def test_wait_for_db_ready(self, patched_sleep):
+        """Test waiting for database if database ready."""
+        default = StandInConnection()
+
+        out = self.call({'default': default})
+
+        self.assertEqual(default.attempts, 1)
+        self.assertEqual(default.queries, ['SELECT 1'])
+        patched_sleep.assert_not_called()
+        self.assertIn('Database available after', out)
+
+    def test_wait_for_db_delay(self, patched_sleep):
+        """Test waiting for database when getting OperationalError."""
+        default = StandInConnection(failures=5)
+
+        out = self.call({'default': default})
+
+        self.assertEqual(default.attempts, 6)
+        self.assertEqual(patched_sleep.call_count, 5)
+        self.assertIn('6 attempts', out)
+
+    def test_backoff_is_bounded(self, patched_sleep):
+        """Test delays grow exponentially but stay under the maximum."""
+        default = StandInConnection(failures=8)
+
+        with patch(
+            'core.management.commands.wait_for_db.random.uniform',
+            side_effect=lambda low, high: high,
+        ):
+            self.call(
+                {'default': default}, initial_delay=1, max_delay=4)
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(delays, [1, 2, 4, 4, 4, 4, 4, 4])
+
+    def test_timeout_raises(self, patched_sleep):
+        """Test the command gives up once the timeout is exceeded."""
+        default = StandInConnection(failures=1000)
+
+        with patch(
+            'core.management.commands.wait_for_db.time.monotonic',
+            side_effect=[0, 1, 5, 11],
+        ):
+            with self.assertRaises(CommandError):
+                self.call({'default': default}, timeout=10)
+
+        self.assertEqual(default.attempts, 3)
+
+    def test_warms_every_database(self, patched_sleep):
+        """Test every configured connection is opened and validated."""
+        default = StandInConnection()
+        replica = StandInConnection(failures=2)
+
+        self.call({'default': default, 'replica': replica})
+
+        self.assertEqual(default.attempts, 1)
+        self.assertEqual(replica.attempts, 3)
+        self.assertEqual(replica.queries, ['SELECT 1'])
+
+    def test_selected_database_only(self, patched_sleep):
+        """Test --database limits which connections are checked."""
+        default = StandInConnection()
+        replica = StandInConnection()
+
+        self.call(
+            {'default': default, 'replica': replica}, databases=['replica'])
+
+        self.assertEqual(default.attempts, 0)
+        self.assertEqual(replica.attempts, 1)
@@ -0,0 +1,146 @@
+"""
+Tests for the metrics middleware and endpoint.
+"""
+import re
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Recipe
+
+METRICS_URL = reverse('metrics')
+RECIPE_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+ASYNC_RECIPE_URL = reverse('recipe:async-recipe-list')
+SERVER_TIMING = re.compile(
+    r'total;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+class HistogramTests(SimpleTestCase):
+    """Test metric types render the Prometheus text format"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('t', 'Test.', ('view',), (1, 5))
+        for value in (0.5, 1, 3, 7):
+            histogram.observe(('a',), value)
+
+        samples = [
+            f'{name}{labels} {value}'
+            for name, labels, value in histogram.samples()
+        ]
+
+        self.assertEqual(samples, [
+            't_bucket{view="a",le="1"} 2',
+            't_bucket{view="a",le="5"} 3',
+            't_bucket{view="a",le="+Inf"} 4',
+            't_sum{view="a"} 11.5',
+            't_count{view="a"} 4',
+        ])
+
+    def test_label_values_are_escaped(self):
+        self.assertEqual(
+            metrics.format_labels(('view',), ('a"b\\c\n',)),
+            r'{view="a\"b\\c\n"}',
+        )
+
+    @patch('core.metrics.pool_stats')
+    def test_pool_stats_exported(self, patched_pool_stats):
+        patched_pool_stats.return_value = {
+            ('default', 'app', 'db'): {
+                'checkouts': 7, 'size': 3, 'idle': 2, 'in_use': 1},
+        }
+
+        text = metrics.render()
+
+        self.assertIn('db_pool_in_use_connections{alias="default"} 1', text)
+        self.assertIn('db_pool_checkouts_total{alias="default"} 7', text)
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test requests are timed and exposed"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testPass123')
+        self.auth = f'Token {Token.objects.create(user=self.user).key}'
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price='1.00')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth)
+
+    def test_server_timing_counts_queries(self):
+        """Test the header reports the queries the request ran"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        match = SERVER_TIMING.fullmatch(res['Server-Timing'])
+        self.assertIsNotNone(match)
+        self.assertEqual(int(match.group(1)), len(ctx))
+
+    def test_metrics_endpoint_lists_views(self):
+        """Test observations are labelled by URL name and action"""
+        self.client.get(RECIPE_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        labels = 'view="recipe:recipe-list",action="list",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}}', text)
+        self.assertIn(f'http_request_db_queries_count{{{labels}}}', text)
+        self.assertIn(
+            f'http_requests_total{{{labels},status="200"}}', text)
+
+    def test_metrics_endpoint_denied_to_other_addresses(self):
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_endpoint_allowed_for_staff(self):
+        staff = get_user_model().objects.create_user(
+            email='staff@example.com', password='testPass123',
+            is_staff=True)
+        self.client.force_login(staff)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_streaming_queries_counted(self):
+        """Test queries run while streaming are observed at the end"""
+        with patch(
+            'core.metrics.observe_request',
+            wraps=metrics.observe_request,
+        ) as observe:
+            res = self.client.get(EXPORT_URL)
+            observe.assert_not_called()
+            with CaptureQueriesContext(connection) as ctx:
+                b''.join(res.streaming_content)
+
+        observe.assert_called_once()
+        labels, status_code, _, _, queries = observe.call_args.args
+        self.assertEqual(labels[0], 'recipe:recipe-export')
+        self.assertGreaterEqual(len(ctx), 1)
+        self.assertGreaterEqual(queries, len(ctx))
+
+    async def test_async_view_queries_counted(self):
+        """Test queries of async views are recorded too"""
+        res = await AsyncClient().get(
+            ASYNC_RECIPE_URL, headers={'Authorization': self.auth})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        match = SERVER_TIMING.fullmatch(res['Server-Timing'])
+        self.assertGreaterEqual(int(match.group(1)), 2)
@@ -0,0 +1,59 @@
+"""
+Tests for data migrations.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'Unapplying the btree_gin extension needs Postgres')
+class MergeDuplicateTagsTests(TransactionTestCase):
+    """Test 0004 folds duplicate tags before making names unique"""
+    migrate_from = [('core', '0003_tag_recipe_tags')]
+    migrate_to = [('core', '0004_recipe_tag_user_indexes')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes()
+        self.addCleanup(self.migrate, latest)
+        self.apps = self.migrate(self.migrate_from)
+
+    def test_duplicates_merged_with_their_recipes(self):
+        User = self.apps.get_model('core', 'User')
+        Recipe = self.apps.get_model('core', 'Recipe')
+        Tag = self.apps.get_model('core', 'Tag')
+        user = User.objects.create(email='test@example.com')
+        other = User.objects.create(email='other@example.com')
+        tags = [Tag.objects.create(user=user, name='Vegan')
+                for _ in range(3)]
+        other_tag = Tag.objects.create(user=other, name='Vegan')
+        recipes = [
+            Recipe.objects.create(
+                user=user, title=f'Recipe {i}', time_minutes=5,
+                price=Decimal('1.00'))
+            for i in range(3)
+        ]
+        recipes[0].tags.add(tags[0], tags[1])
+        recipes[1].tags.add(tags[1])
+        recipes[2].tags.add(tags[2])
+
+        apps = self.migrate(self.migrate_to)
+
+        Tag = apps.get_model('core', 'Tag')
+        Recipe = apps.get_model('core', 'Recipe')
+        kept = Tag.objects.get(user_id=user.id, name='Vegan')
+        self.assertEqual(kept.id, tags[0].id)
+        self.assertTrue(Tag.objects.filter(id=other_tag.id).exists())
+        linked = Recipe.objects.filter(tags=kept).order_by('id')
+        self.assertEqual(
+            [recipe.id for recipe in linked],
+            [recipe.id for recipe in recipes])
@@ -1,4 +1,7 @@
 from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -72,3 +75,45 @@ class ModelTests(TestCase):
         tag = models.Tag.objects.create(user=user, name='tag1')
 
         self.assertEqual(str(tag), tag.name)
+
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='tag1')
+        models.Tag.objects.create(user=other_user, name='tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='tag1')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Plans checked on Postgres')
+class IndexUsageTests(TestCase):
+    """Test the planner uses the per-user indexes"""
+
+    def setUp(self):
+        self.user = create_user()
+        # Test tables are tiny, so stop the planner preferring seq scans.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_recipe_list_uses_user_id_index(self):
+        """Test listing a user's recipes uses the (user, -id) index"""
+        plan = models.Recipe.objects.filter(
+            user=self.user).order_by('-id').explain()
+
+        self.assertIn('core_recipe_user_id_desc_idx', plan)
+
+    def test_tag_lookup_uses_user_name_index(self):
+        """Test looking up tags by name uses the (user, name) index"""
+        plan = models.Tag.objects.filter(
+            user=self.user, name__in=['a', 'b']).explain()
+
+        self.assertIn('core_tag_user_name_uniq', plan)
+
+    def test_tag_list_uses_user_name_index(self):
+        """Test listing a user's tags by name uses the (user, name) index"""
+        plan = models.Tag.objects.filter(
+            user=self.user).order_by('-name').explain()
+
+        self.assertIn('core_tag_user_name_uniq', plan)
@@ -0,0 +1,49 @@
+"""
+Tests for the estimated count paginator.
+"""
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Tag
+from core.pagination import EstimatedCountPaginator
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Tests for EstimatedCountPaginator."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+
+    def test_exact_count_below_threshold(self):
+        paginator = EstimatedCountPaginator(
+            Tag.objects.order_by('id'), 2)
+
+        self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.is_estimate)
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_exact_count_for_lists(self):
+        paginator = EstimatedCountPaginator(
+            list(range(7)), 2, estimate_threshold=0)
+
+        self.assertEqual(paginator.count, 7)
+        self.assertFalse(paginator.is_estimate)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Postgres estimates')
+    def test_estimate_above_threshold(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_tag')
+        paginator = EstimatedCountPaginator(
+            Tag.objects.filter(user=self.user).order_by('id'), 2,
+            estimate_threshold=0)
+
+        self.assertGreater(paginator.count, 0)
+        self.assertTrue(paginator.is_estimate)
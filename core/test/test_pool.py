@@ -0,0 +1,181 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Connection stand-in recording how the pool treats it"""
+
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    return ConnectionPool(
+        close=FakeConnection.close,
+        reset=lambda conn: not conn.closed,
+        ping=lambda conn: conn.healthy,
+        **kwargs,
+    )
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test pool checkout, release and counters"""
+
+    def test_released_connection_is_reused(self):
+        """Test a returned connection is handed out again"""
+        pool = make_pool(max_size=2)
+        conn = pool.checkout(FakeConnection)
+        pool.release(conn)
+
+        self.assertIs(pool.checkout(FakeConnection), conn)
+        stats = pool.stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        """Test waiting past the timeout raises and is counted"""
+        pool = make_pool(max_size=1, timeout=0.01)
+        pool.checkout(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection)
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_waiter_gets_released_connection(self):
+        """Test a blocked checkout resumes when a connection is returned"""
+        pool = make_pool(max_size=1, timeout=5)
+        conn = pool.checkout(FakeConnection)
+        got = []
+        waiter = threading.Thread(
+            target=lambda: got.append(pool.checkout(FakeConnection)))
+        waiter.start()
+        while pool.stats()['waits'] == 0:
+            time.sleep(0.001)
+
+        pool.release(conn)
+        waiter.join()
+
+        self.assertEqual(got, [conn])
+        self.assertEqual(pool.stats()['timeouts'], 0)
+
+    def test_unhealthy_connection_replaced(self):
+        """Test a connection failing its health check is discarded"""
+        pool = make_pool(health_check_after=0)
+        conn = pool.checkout(FakeConnection)
+        pool.release(conn)
+        conn.healthy = False
+
+        new_conn = pool.checkout(FakeConnection)
+
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['discards'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_recently_used_connection_not_pinged(self):
+        """Test health checks only run after the idle threshold"""
+        pool = make_pool(health_check_after=60)
+        pool.release(pool.checkout(FakeConnection))
+
+        pool.checkout(FakeConnection)
+
+        self.assertEqual(pool.stats()['health_checks'], 0)
+
+    def test_idle_threshold_pings(self):
+        """Test connections idle for the threshold or more are pinged"""
+        pool = make_pool(health_check_after=30)
+        conn = pool.checkout(FakeConnection)
+        for idle, checks in ((29.9, 0), (30, 1), (300, 2)):
+            with patch('core.db.pool.time.monotonic', return_value=0):
+                pool.release(conn)
+            with patch('core.db.pool.time.monotonic', return_value=idle):
+                conn = pool.checkout(FakeConnection)
+
+            self.assertEqual(pool.stats()['health_checks'], checks)
+
+    def test_zero_threshold_pings_every_checkout(self):
+        """Test health_check_after=0 checks on every checkout"""
+        pool = make_pool(health_check_after=0)
+        for _ in range(3):
+            pool.release(pool.checkout(FakeConnection))
+
+        self.assertEqual(pool.stats()['health_checks'], 2)
+
+    def test_broken_connection_not_returned(self):
+        """Test a connection that cannot be reset leaves the pool"""
+        pool = make_pool()
+        conn = pool.checkout(FakeConnection)
+        conn.closed = True
+
+        pool.release(conn)
+
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_idle_connections_expire_above_min_size(self):
+        """Test idle connections past max_idle are closed down to min_size"""
+        pool = make_pool(min_size=1, max_size=3, max_idle=10)
+        conns = [pool.checkout(FakeConnection) for _ in range(3)]
+        with patch('core.db.pool.time.monotonic', return_value=0):
+            for conn in conns:
+                pool.release(conn)
+
+        with patch('core.db.pool.time.monotonic', return_value=100):
+            pool.checkout(FakeConnection)
+
+        self.assertEqual(sum(conn.closed for conn in conns), 2)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_fill_opens_min_size(self):
+        """Test the pool can be warmed to its minimum size"""
+        pool = make_pool(min_size=3, max_size=5)
+
+        pool.fill(FakeConnection)
+
+        self.assertEqual(pool.stats()['idle'], 3)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failing connect does not leak pool capacity"""
+        pool = make_pool(max_size=1, timeout=0.01)
+
+        def fail():
+            raise OSError('refused')
+
+        with self.assertRaises(OSError):
+            pool.checkout(fail)
+
+        self.assertIsInstance(pool.checkout(FakeConnection), FakeConnection)
+
+
+@skipUnless(hasattr(connection, 'get_pool'), 'Needs the pooled backend')
+class PooledBackendTests(TransactionTestCase):
+    """Test the backend keeps pool upkeep out of checkouts"""
+
+    def test_filled_on_release_not_checkout(self):
+        connection.close()
+        with patch.object(ConnectionPool, 'fill') as fill:
+            connection.ensure_connection()
+        fill.assert_not_called()
+        pool = connection._pool
+
+        connection.close()
+
+        self.assertGreaterEqual(pool.stats()['size'], pool.min_size)
+        self.assertGreaterEqual(pool.stats()['idle'], 1)
@@ -0,0 +1,84 @@
+"""
+Tests for the sampled profiling middleware.
+"""
+import os
+import pstats
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+RECIPE_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+
+def profiling(**config):
+    return override_settings(PROFILING={
+        'ENABLED': True,
+        'SAMPLE_RATES': {'/api/recipe/': 1.0, '/api/user/': 0},
+        'SLOW_QUERY_MS': 0,
+        **config,
+    })
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Test sampled requests are logged and profiled"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testPass123')
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price='1.00')
+
+    def get(self, url):
+        # A new client loads the middleware with the current settings.
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    @profiling()
+    def test_slow_queries_logged_with_view_user_and_frame(self):
+        with self.assertLogs('core.profiling', 'WARNING') as logs:
+            self.get(RECIPE_URL)
+
+        message = logs.output[0]
+        self.assertIn('recipe:recipe-list', message)
+        self.assertIn(f'for user {self.user.id} ', message)
+        self.assertIn(os.path.join('recipe', 'fastpath.py'), message)
+        self.assertIn('core_recipe', ''.join(logs.output))
+
+    @profiling()
+    def test_prefix_with_zero_rate_not_sampled(self):
+        with self.assertNoLogs('core.profiling'):
+            self.get(ME_URL)
+
+    @profiling(SLOW_QUERY_MS=60000)
+    def test_fast_queries_not_logged(self):
+        with self.assertNoLogs('core.profiling', 'WARNING'):
+            self.get(RECIPE_URL)
+
+    @override_settings(PROFILING={'ENABLED': False})
+    def test_disabled(self):
+        with self.assertNoLogs('core.profiling'):
+            self.get(RECIPE_URL)
+
+    def test_profile_written_to_disk(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with profiling(PROFILE_DIR=profile_dir, SLOW_QUERY_MS=60000):
+                self.get(RECIPE_URL)
+
+            files = os.listdir(profile_dir)
+            self.assertEqual(len(files), 1)
+            self.assertIn('recipe-list', files[0])
+            stats = pstats.Stats(os.path.join(profile_dir, files[0]))
+            self.assertTrue(stats.total_calls)
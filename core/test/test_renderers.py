@@ -0,0 +1,152 @@
+"""
+Tests for the orjson based renderer and parser.
+"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+SAMPLE = {
+    'id': 1,
+    'title': 'Crème brûlée \u2028 line \u2029 para',
+    'price': Decimal('5.25'),
+    'ratio': 0.1,
+    'created': datetime.datetime(
+        2023, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'local': timezone.make_aware(
+        datetime.datetime(2023, 5, 1, 12, 30),
+        timezone.get_fixed_timezone(120)),
+    'naive': datetime.datetime(2023, 5, 1, 12, 30),
+    'day': datetime.date(2023, 5, 1),
+    'at': datetime.time(7, 45),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('Recipes'),
+    'tags': [ReturnDict({'id': 2, 'name': 'Vegan'}, serializer=None)],
+    'empty': None,
+    'flags': [True, False],
+    1: 'int key',
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the renderer matches the DRF renderer"""
+
+    def assertSameAsDRF(self, data, accepted_media_type=None, context=None):
+        expected = JSONRenderer().render(data, accepted_media_type, context)
+        rendered = FastJSONRenderer().render(
+            data, accepted_media_type, context)
+        self.assertEqual(rendered, expected)
+
+    def test_matches_drf_output(self):
+        self.assertSameAsDRF(SAMPLE)
+        self.assertSameAsDRF([SAMPLE, SAMPLE])
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indent_falls_back(self):
+        self.assertSameAsDRF(SAMPLE, 'application/json; indent=4')
+        self.assertSameAsDRF(SAMPLE, context={'indent': 2})
+
+    def test_unsupported_values_fall_back(self):
+        self.assertSameAsDRF({'big': 2 ** 70})
+
+    def test_non_finite_floats_raise(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value):
+                data = {'tags': [{'ratio': value}], 'empty': None}
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render(data)
+
+    def test_exponent_floats_parse_the_same(self):
+        """Test only the exponent notation differs from DRF"""
+        data = {'big': 1e16, 'small': 1e-7}
+        rendered = FastJSONRenderer().render(data)
+
+        self.assertEqual(rendered, b'{"big":1e16,"small":1e-7}')
+        self.assertEqual(
+            json.loads(rendered), json.loads(JSONRenderer().render(data)))
+
+    def test_without_orjson(self):
+        with patch('core.renderers.orjson', None):
+            self.assertSameAsDRF(SAMPLE)
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the parser accepts what the DRF parser accepts"""
+
+    def parse(self, parser, body):
+        return parser.parse(BytesIO(body), parser_context={})
+
+    def test_matches_drf_parser(self):
+        body = '{"title": "Crème", "tags": [{"name": "a"}], "n": 1.5}'
+        body = body.encode()
+
+        self.assertEqual(
+            self.parse(FastJSONParser(), body),
+            self.parse(JSONParser(), body),
+        )
+
+    def test_invalid_json_raises_parse_error(self):
+        for body in (b'{"title": ', b'{"n": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), body)
+
+    def test_without_orjson(self):
+        with patch('core.parsers.orjson', None):
+            self.assertEqual(
+                self.parse(FastJSONParser(), b'{"a": [1, 2]}'),
+                {'a': [1, 2]},
+            )
+
+
+class RendererApiTests(TestCase):
+    """Test the API still works with the renderer configured"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testPass123', name='Tést')
+
+    def test_create_token_renders_json(self):
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': 'test@example.com', 'password': 'testPass123'},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertIn('token', res.json())
+
+    def test_browsable_api(self):
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(ME_URL, HTTP_ACCEPT='text/html')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('text/html', res['Content-Type'])
+        self.assertIn('Tést', res.content.decode())
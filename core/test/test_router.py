@@ -0,0 +1,221 @@
+"""
+Tests for the read replica router.
+"""
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from core.db.router import (
+    RequestRouting,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    ReplicaSelector,
+    current_routing,
+    used_replica,
+)
+from core.models import Recipe
+
+# The real start, as ReplicaRouterTests patch it out.
+start_checks = ReplicaSelector.start
+
+REPLICAS = {
+    'ALIASES': ['replica1', 'replica2'],
+    'PIN_SECONDS': 5,
+    'MAX_LAG_SECONDS': 10,
+    'CHECK_INTERVAL': 60,
+}
+
+
+class StandInCursor:
+    """Cursor answering the lag query for StandInReplica"""
+
+    def __init__(self, replica):
+        self.replica = replica
+
+    def __enter__(self):
+        if not self.replica.up:
+            raise OperationalError('connection refused')
+        self.replica.checks += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        pass
+
+    def fetchone(self):
+        return (self.replica.lag,)
+
+
+class StandInReplica:
+    """Replica connection with a configurable health and lag"""
+    vendor = 'postgresql'
+
+    def __init__(self, up=True, lag=0):
+        self.up = up
+        self.lag = lag
+        self.checks = 0
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def close(self):
+        pass
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    """Test which database reads and writes are sent to"""
+
+    def setUp(self):
+        self.replicas = {
+            'replica1': StandInReplica(), 'replica2': StandInReplica()}
+        patcher = patch('core.db.router.connections', self.replicas)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Checks run in the foreground here, see refresh().
+        patcher = patch.object(ReplicaSelector, 'start')
+        self.start = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = ReplicaRouter()
+
+    def in_request(self, pinned=False):
+        self.router.selector.refresh()
+        token = current_routing.set(RequestRouting(pinned))
+        self.addCleanup(current_routing.reset, token)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_safe_request_reads_use_replicas(self):
+        self.in_request()
+
+        used = {self.router.db_for_read(Recipe) for _ in range(50)}
+
+        self.assertEqual(used, {'replica1', 'replica2'})
+        self.assertTrue(used_replica())
+
+    def test_read_after_write_uses_primary(self):
+        self.in_request()
+
+        self.assertEqual(self.router.db_for_write(Recipe), 'default')
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        self.assertFalse(used_replica())
+
+    def test_pinned_request_uses_primary(self):
+        self.in_request(pinned=True)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_primary_apps_read_from_primary(self):
+        self.in_request()
+
+        self.assertEqual(self.router.db_for_read(Token), 'default')
+
+    def test_unhealthy_and_lagging_replicas_skipped(self):
+        self.replicas['replica1'].up = False
+        self.replicas['replica2'].lag = 30
+        self.in_request()
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_only_usable_replica_chosen(self):
+        self.replicas['replica2'].lag = 30
+        self.in_request()
+
+        used = {self.router.db_for_read(Recipe) for _ in range(20)}
+
+        self.assertEqual(used, {'replica1'})
+
+    def test_reads_do_not_check_health(self):
+        self.in_request()
+
+        for _ in range(20):
+            self.router.db_for_read(Recipe)
+
+        self.assertEqual(self.replicas['replica1'].checks, 1)
+        self.start.assert_called()
+
+    def test_primary_until_first_check(self):
+        token = current_routing.set(RequestRouting(False))
+        self.addCleanup(current_routing.reset, token)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        self.assertEqual(self.replicas['replica1'].checks, 0)
+
+    def test_stale_status_not_trusted(self):
+        self.in_request()
+        selector = self.router.selector
+        checked_at = time.monotonic() - selector.check_interval * 4
+
+        for alias in ('replica1', 'replica2'):
+            selector._status[alias] = (checked_at, True, 0.0)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_background_thread_checks_replicas(self):
+        selector = ReplicaSelector(['replica1'], 10, 60)
+
+        start_checks(selector)
+
+        self.assertTrue(selector.checked.wait(5))
+        self.assertTrue(selector.usable('replica1'))
+
+    def test_no_migrations_on_replicas(self):
+        self.assertIs(self.router.allow_migrate('replica1', 'core'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Test requests are marked and writers pinned to the primary"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.seen = []
+
+    def view(self, write=False):
+        def get_response(request):
+            routing = current_routing.get()
+            self.seen.append(routing.pinned)
+            if write:
+                routing.pinned = routing.wrote = True
+            return HttpResponse()
+        return ReplicaRoutingMiddleware(get_response)
+
+    def test_safe_request_not_pinned(self):
+        self.view()(self.factory.get('/'))
+
+        self.assertEqual(self.seen, [False])
+        self.assertIsNone(current_routing.get())
+
+    def test_unsafe_request_pinned(self):
+        self.view()(self.factory.post('/'))
+
+        self.assertEqual(self.seen, [True])
+
+    def test_writer_pinned_for_next_requests(self):
+        auth = {'HTTP_AUTHORIZATION': 'Token abc'}
+        self.view(write=True)(self.factory.post('/', **auth))
+
+        self.view()(self.factory.get('/', **auth))
+        self.view()(self.factory.get(
+            '/', HTTP_AUTHORIZATION='Token other'))
+
+        self.assertEqual(self.seen, [True, True, False])
+
+    @override_settings(DATABASE_REPLICAS={**REPLICAS, 'PIN_SECONDS': 0})
+    def test_pin_expires(self):
+        auth = {'HTTP_AUTHORIZATION': 'Token abc'}
+        self.view(write=True)(self.factory.post('/', **auth))
+
+        self.view()(self.factory.get('/', **auth))
+
+        self.assertEqual(self.seen, [True, False])
@@ -0,0 +1,137 @@
+"""
+Tests for the prebuilt OpenAPI schema.
+"""
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+DOCS_URL = reverse('api-docs')
+
+
+class SchemaTestCase(SimpleTestCase):
+    """Start every test without a loaded schema"""
+
+    def setUp(self):
+        schema.clear_schema()
+        self.addCleanup(schema.clear_schema)
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, 'openapi.json')
+
+
+class SchemaViewTests(SchemaTestCase):
+    """Tests for serving the schema."""
+
+    def test_schema_generated_once(self):
+        with patch.object(
+            schema, 'generate_schema', wraps=schema.generate_schema,
+        ) as generate:
+            res = self.client.get(SCHEMA_URL)
+            self.client.get(SCHEMA_URL)
+            self.client.get(SCHEMA_URL, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(generate.call_count, 1)
+        self.assertTrue(res.content.startswith(b'openapi: 3.0.3'))
+        self.assertIn(b'/api/recipe/recipes/', res.content)
+        self.assertEqual(res['Cache-Control'], 'no-cache')
+
+    def test_json_schema(self):
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertIn('/api/recipe/recipes/', json.loads(res.content)['paths'])
+
+    def test_etag_not_modified(self):
+        res = self.client.get(SCHEMA_URL)
+        res_json = self.client.get(SCHEMA_URL, {'format': 'json'})
+        cached = self.client.get(
+            SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        changed = self.client.get(
+            SCHEMA_URL, HTTP_IF_NONE_MATCH=res_json['ETag'])
+
+        self.assertNotEqual(res['ETag'], res_json['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], res['ETag'])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_gzip(self):
+        plain = self.client.get(SCHEMA_URL)
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(res['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertNotIn('Content-Encoding', plain)
+
+    def test_lang_generates_schema(self):
+        with patch.object(schema, 'generate_schema') as generate:
+            res = self.client.get(SCHEMA_URL, {'lang': 'en'})
+
+        self.assertEqual(res.status_code, 200)
+        generate.assert_not_called()
+        self.assertNotIn('ETag', res)
+
+    def test_swagger_ui(self):
+        res = self.client.get(DOCS_URL)
+
+        self.assertContains(res, SCHEMA_URL)
+
+
+class SchemaArtifactTests(SchemaTestCase):
+    """Tests for the build_schema command and its artifact."""
+
+    def test_build_and_serve_artifact(self):
+        out = StringIO()
+        with override_settings(OPENAPI_SCHEMA={
+            'ARTIFACT_PATH': self.path, 'VERSION': 'abc123',
+        }):
+            call_command('build_schema', stdout=out)
+            with open(self.path) as artifact:
+                content = json.load(artifact)
+            content['schema']['info']['title'] = 'From artifact'
+            with open(self.path, 'w') as artifact:
+                json.dump(content, artifact)
+
+            with patch.object(schema, 'generate_schema') as generate:
+                res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        generate.assert_not_called()
+        self.assertEqual(content['version'], 'abc123')
+        self.assertIn(self.path, out.getvalue())
+        self.assertEqual(
+            json.loads(res.content)['info']['title'], 'From artifact')
+        self.assertTrue(res['ETag'].startswith('W/"abc123-'))
+
+    def test_artifact_of_other_version_ignored(self):
+        call_command(
+            'build_schema', output=self.path, schema_version='old',
+            stdout=StringIO(),
+        )
+        with override_settings(OPENAPI_SCHEMA={
+            'ARTIFACT_PATH': self.path, 'VERSION': 'new',
+        }):
+            with patch.object(
+                schema, 'generate_schema', wraps=schema.generate_schema,
+            ) as generate, self.assertLogs('core.schema', 'WARNING'):
+                res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(generate.call_count, 1)
+
+    @override_settings(OPENAPI_SCHEMA={'ARTIFACT_PATH': None})
+    def test_build_without_path(self):
+        with self.assertRaises(CommandError):
+            call_command('build_schema', stdout=StringIO())
@@ -1,3 +1,81 @@
-from django.shortcuts import render
+import ipaddress
+import re
 
-# Create your views here.
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.views.decorators.http import require_GET
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+from core import metrics
+from core.schema import get_schema
+
+accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def metrics_allowed(request):
+    """Return whether staff or an allowed address made the request"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    config = getattr(settings, 'METRICS', {})
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in config.get('ALLOWED_IPS', ())
+    )
+
+
+@require_GET
+def metrics_view(request):
+    """Expose request and pool metrics for Prometheus to scrape"""
+    if not metrics_allowed(request):
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+class SchemaView(SpectacularAPIView):
+    """
+    SpectacularAPIView serving the prebuilt schema from memory.
+
+    Clients revalidate with the ETag and get the gzipped body when they
+    accept it. Only ?lang= and ?version= variants are still generated.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('lang') or request.GET.get('version'):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        rendered = get_schema().formats[renderer.format]
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        encoding = request.headers.get('Accept-Encoding', '')
+        if accepts_gzip.search(encoding):
+            response = HttpResponse(
+                rendered.gzipped, content_type=content_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(
+                rendered.content, content_type=content_type)
+        response['ETag'] = rendered.etag
+        response['Content-Disposition'] = (
+            f'inline; filename="{self._get_filename(request, None)}"')
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        patch_cache_control(response, no_cache=True)
+        return get_conditional_response(
+            request, etag=rendered.etag, response=response)
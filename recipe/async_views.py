@@ -0,0 +1,163 @@
+"""
+Async views for read-only recipe APIs, served natively under ASGI
+"""
+import functools
+from collections import defaultdict
+
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+
+from core.authentication import CachedTokenAuthentication
+from core.models import Recipe, Tag
+from core.renderers import FastJSONRenderer
+from recipe import serializers
+from recipe.fastpath import LINK_TAG_ORDERING
+from recipe.pagination import RecipeCursorPagination, TagCursorPagination
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    """Render data the same way the DRF JSON renderer does"""
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code,
+        headers=headers,
+    )
+
+
+async def authenticate(request):
+    """Return the token user for the request, or an error response"""
+    authenticator = CachedTokenAuthentication()
+    try:
+        result = await authenticator.aauthenticate(request)
+    except exceptions.AuthenticationFailed as exc:
+        result, detail = None, exc.detail
+    else:
+        detail = 'Authentication credentials were not provided.'
+
+    if result is None:
+        return None, json_response(
+            {'detail': detail},
+            status.HTTP_401_UNAUTHORIZED,
+            {'WWW-Authenticate': authenticator.authenticate_header(request)},
+        )
+    return result[0], None
+
+
+def token_get_view(view):
+    """Allow only reads and pass the token user to an async view"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+                {'Allow': 'GET, HEAD'},
+            )
+        user, error = await authenticate(request)
+        if error:
+            return error
+        return await view(request, user, *args, **kwargs)
+
+    return wrapper
+
+
+def represent_recipes(serializer_class, recipes, tags):
+    """Serialize recipes with their tags loaded separately"""
+    serializer = serializer_class()
+    del serializer.fields['tags']
+    results = []
+    for recipe in recipes:
+        data = serializer.to_representation(recipe)
+        data['tags'] = serializers.TagSerializer(
+            tags[recipe.id], many=True).data
+        results.append(
+            {name: data[name] for name in serializer_class.Meta.fields})
+    return results
+
+
+async def load_tags(recipe_ids):
+    """Return tags per recipe id in a single query"""
+    tags = defaultdict(list)
+    links = Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).select_related('tag').order_by(*LINK_TAG_ORDERING)
+    async for link in links.aiterator():
+        tags[link.recipe_id].append(link.tag)
+    return tags
+
+
+async def paginate(request, paginator, queryset, position_field):
+    """Forward keyset pagination compatible with the DRF cursors"""
+    drf_request = Request(request)
+    paginator.base_url = request.build_absolute_uri()
+    try:
+        page_size = paginator.get_page_size(drf_request)
+        cursor = paginator.decode_cursor(drf_request)
+    except exceptions.NotFound as exc:
+        return None, json_response(
+            {'detail': exc.detail}, status.HTTP_404_NOT_FOUND)
+
+    if cursor is not None:
+        if cursor.reverse or cursor.offset:
+            return None, json_response(
+                {'detail': 'Only forward cursors are supported.'},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = queryset.filter(
+            **{f'{position_field}__lt': cursor.position})
+
+    rows = [row async for row in queryset[:page_size + 1].aiterator()]
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        position = str(getattr(rows[-1], position_field))
+        next_url = paginator.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position))
+    return (rows, next_url), None
+
+
+@token_get_view
+async def recipe_list(request, user):
+    """List the authenticated user's recipes"""
+    queryset = Recipe.objects.filter(user=user).order_by('-id')
+    page, error = await paginate(
+        request, RecipeCursorPagination(), queryset, 'id')
+    if error:
+        return error
+
+    recipes, next_url = page
+    tags = await load_tags([recipe.id for recipe in recipes])
+    results = represent_recipes(serializers.RecipeSerializer, recipes, tags)
+    return json_response(
+        {'next': next_url, 'previous': None, 'results': results})
+
+
+@token_get_view
+async def recipe_detail(request, user, pk):
+    """Retrieve one of the authenticated user's recipes"""
+    recipe = await Recipe.objects.filter(user=user, pk=pk).afirst()
+    if recipe is None:
+        return json_response(
+            {'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+    tags = await load_tags([recipe.id])
+    return json_response(represent_recipes(
+        serializers.RecipeDetailSerializer, [recipe], tags)[0])
+
+
+@token_get_view
+async def tag_list(request, user):
+    """List the authenticated user's tags"""
+    queryset = Tag.objects.filter(user=user).order_by('-name', 'id')
+    page, error = await paginate(
+        request, TagCursorPagination(), queryset, 'name')
+    if error:
+        return error
+
+    tags, next_url = page
+    results = serializers.TagSerializer(tags, many=True).data
+    return json_response(
+        {'next': next_url, 'previous': None, 'results': results})
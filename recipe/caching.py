@@ -0,0 +1,159 @@
+"""
+Per-user response caching for recipe APIs
+"""
+import hashlib
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+
+from core.db.router import used_replica
+
+VERSION_KEY_PREFIX = 'api-version:'
+RESPONSE_KEY_PREFIX = 'api-response:'
+REPLAYED_HEADERS = ['Content-Type', 'Vary', 'Allow']
+
+# User whose invalidations are held back by batched_invalidation().
+batched_user = ContextVar('batched_user', default=None)
+
+
+def get_timeout():
+    return getattr(settings, 'API_RESPONSE_CACHE', {}).get('TIMEOUT', 600)
+
+
+def get_user_version(user_id):
+    """Return the cache version for a user's recipes and tags"""
+    key = VERSION_KEY_PREFIX + str(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_user_version(user_id):
+    cache.set(VERSION_KEY_PREFIX + str(user_id), uuid.uuid4().hex, None)
+
+
+def invalidate_user_responses(user_id):
+    """Make every cached response for the user unreachable"""
+    if batched_user.get() == user_id:
+        return
+    _bump_user_version(user_id)
+    # Bump again once the data is visible to other requests, so a body
+    # rendered from pre-commit data is not served under the new version.
+    transaction.on_commit(lambda: _bump_user_version(user_id))
+
+
+@contextmanager
+def batched_invalidation(user_id):
+    """Invalidate the user's responses once, after every write inside"""
+    token = batched_user.set(user_id)
+    try:
+        yield
+    finally:
+        batched_user.reset(token)
+    invalidate_user_responses(user_id)
+
+
+def etag_matches(request, etag):
+    """Check the request If-None-Match header against an ETag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+class CachedResponseMixin:
+    """
+    Cache rendered GET responses per user and answer with ETags.
+
+    Cached actions are looked up before running the queryset, and a
+    matching If-None-Match gets a 304 without sending the body.
+    """
+    cached_actions = ['list', 'retrieve']
+    _cache_key = None
+
+    def _response_cache_key(self, request):
+        version = get_user_version(request.user.pk)
+        variant = f'{request.get_full_path()}|{request.accepted_media_type}'
+        digest = hashlib.md5(variant.encode()).hexdigest()
+        return f'{RESPONSE_KEY_PREFIX}{request.user.pk}:{version}:{digest}'
+
+    def _is_cacheable(self, request):
+        return (
+            request.method == 'GET'
+            and self.action in self.cached_actions
+            and request.user.is_authenticated
+        )
+
+    def _not_modified(self, etag, headers):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        if 'Vary' in headers:
+            response['Vary'] = headers['Vary']
+        return response
+
+    def handle_cached(self, request):
+        """Return a response from cache, or None on a miss"""
+        if not self._is_cacheable(request):
+            return None
+
+        self._cache_key = self._response_cache_key(request)
+        cached = cache.get(self._cache_key)
+        if cached is None:
+            return None
+
+        content, etag, headers = cached
+        if etag_matches(request, etag):
+            return self._not_modified(etag, headers)
+
+        response = HttpResponse(content)
+        for name, value in headers.items():
+            response[name] = value
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.handle_cached(request) or super().list(
+            request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.handle_cached(request) or super().retrieve(
+            request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if self._cache_key is None or not isinstance(response, Response):
+            return response
+        if response.status_code != 200:
+            return response
+
+        patch_vary_headers(response, ['Authorization'])
+        response.render()
+        etag = quote_etag(hashlib.sha1(response.content).hexdigest())
+        response['ETag'] = etag
+        headers = {
+            name: response[name]
+            for name in REPLAYED_HEADERS if name in response
+        }
+        # A lagging replica may have missed writes that already bumped
+        # the version, so only primary reads are cached.
+        if not used_replica():
+            cache.set(
+                self._cache_key, (response.content, etag, headers),
+                get_timeout())
+
+        if etag_matches(request, etag):
+            return self._not_modified(etag, headers)
+        return response
@@ -0,0 +1,75 @@
+"""
+Streaming export of a user's recipes
+"""
+import csv
+import json
+from collections import defaultdict
+
+from core.models import Recipe
+
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'time_minutes', 'price', 'link', 'tags',
+]
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def iter_recipe_chunks(user, chunk_size=CHUNK_SIZE):
+    """Yield lists of recipe rows with tag names, one chunk at a time"""
+    rows = Recipe.objects.filter(user=user).order_by('id').values(
+        *EXPORT_FIELDS[:-1]
+    ).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield attach_tags(chunk)
+            chunk = []
+    if chunk:
+        yield attach_tags(chunk)
+
+
+def attach_tags(rows):
+    """Add tag names to a chunk of recipe rows with one query"""
+    tags = defaultdict(list)
+    links = Recipe.tags.through.objects.filter(
+        recipe_id__in=[row['id'] for row in rows],
+    ).order_by('tag__name').values_list('recipe_id', 'tag__name')
+    for recipe_id, name in links:
+        tags[recipe_id].append(name)
+
+    for row in rows:
+        row['price'] = str(row['price'])
+        row['tags'] = tags[row['id']]
+    return rows
+
+
+def stream_ndjson(user, chunk_size=CHUNK_SIZE):
+    for chunk in iter_recipe_chunks(user, chunk_size):
+        yield ''.join(json.dumps(row) + '\n' for row in chunk)
+
+
+def stream_csv(user, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for chunk in iter_recipe_chunks(user, chunk_size):
+        yield ''.join(
+            writer.writerow(
+                [row[field] for field in EXPORT_FIELDS[:-1]]
+                + [';'.join(row['tags'])]
+            )
+            for row in chunk
+        )
+
+
+EXPORT_FORMATS = {
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv'),
+}
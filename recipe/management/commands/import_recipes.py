@@ -0,0 +1,205 @@
+"""
+Django command to bulk import recipes from JSONL or CSV
+"""
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from recipe.caching import invalidate_user_responses
+from recipe.serializers import RecipeDetailSerializer
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            yield None
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield ValueError(f'Invalid JSON: {exc}')
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # DictReader files extra values under None.
+        if None in row:
+            yield ValueError(
+                f'Line {reader.line_num}: more values than the '
+                f'{len(reader.fieldnames)} columns of the header.')
+            continue
+        # Short rows leave the missing columns None. Drop them so
+        # validation reports required ones as missing.
+        row = {name: value for name, value in row.items()
+               if value is not None}
+        row['tags'] = [
+            name for name in (row.get('tags') or '').split(';') if name]
+        yield row
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def normalize_tags(tags):
+    """Accept tags as names or {'name': ...} objects"""
+    return [tag if isinstance(tag, dict) else {'name': tag} for tag in tags]
+
+
+class Command(BaseCommand):
+    """Django command to import recipes in large batches"""
+
+    help = (
+        'Import recipes from a JSONL or CSV file (or - for stdin). Rows are '
+        'validated like the recipe API and written with bulk inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin.')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Input format. Defaults to the file extension.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of the owner for rows without a user column.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows validated and written per transaction.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'File recording the last committed row, used to resume. '
+                'A crash between commit and checkpoint repeats one batch.'
+            ),
+        )
+
+    def get_reader(self, path, input_format):
+        if input_format is None:
+            extension = os.path.splitext(path)[1].lstrip('.')
+            input_format = {'ndjson': 'jsonl'}.get(extension, extension)
+        if input_format not in READERS:
+            raise CommandError('Pass --format, the format was not detected.')
+        return READERS[input_format]
+
+    def read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+
+    def write_checkpoint(self, path, rows_done):
+        if not path:
+            return
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as checkpoint:
+            checkpoint.write(str(rows_done))
+        os.replace(tmp_path, path)
+
+    def get_users(self, batch, default_email):
+        """Load the owners of a batch in one query"""
+        emails = {
+            row.get('user') or default_email
+            for _, row in batch if isinstance(row, dict)
+        }
+        emails.discard(None)
+        users = get_user_model().objects.filter(email__in=emails)
+        return {user.email: user for user in users}
+
+    def import_batch(self, batch, default_email):
+        """Validate and write one batch, returning (imported, errors)"""
+        users = self.get_users(batch, default_email)
+        serializers = {}
+        valid_by_user = {}
+        errors = []
+
+        for row_number, row in batch:
+            if row is None:
+                continue
+            if isinstance(row, Exception):
+                errors.append((row_number, str(row)))
+                continue
+            if not isinstance(row, dict):
+                errors.append((row_number, 'Expected an object.'))
+                continue
+            email = row.pop('user', None) or default_email
+            user = users.get(email)
+            if user is None:
+                errors.append((row_number, {'user': [f'Unknown {email!r}.']}))
+                continue
+            row.pop('id', None)
+            row['tags'] = normalize_tags(row.get('tags') or [])
+
+            serializer = serializers.get(user.pk)
+            if serializer is None:
+                serializer = serializers[user.pk] = RecipeDetailSerializer(
+                    many=True, context={'user': user})
+            try:
+                data = serializer.child.run_validation(row)
+            except ValidationError as exc:
+                errors.append((row_number, exc.detail))
+                continue
+            valid_by_user.setdefault(user.pk, []).append(
+                {**data, 'user': user})
+
+        imported = 0
+        with transaction.atomic():
+            for user_id, items in valid_by_user.items():
+                serializers[user_id].create(items)
+                invalidate_user_responses(user_id)
+                imported += len(items)
+        return imported, errors
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = self.get_reader(path, options['format'])
+        batch_size = options['batch_size']
+        checkpoint = options['checkpoint']
+        skip = self.read_checkpoint(checkpoint)
+
+        stream = sys.stdin if path == '-' else open(path, newline='')
+        try:
+            rows = enumerate(reader(stream), start=1)
+            if skip:
+                self.stdout.write(f'Resuming after row {skip}.')
+                rows = islice(rows, skip, None)
+
+            start = time.monotonic()
+            done, imported, failed = skip, 0, 0
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                count, errors = self.import_batch(batch, options['user'])
+                for row_number, detail in errors:
+                    self.stderr.write(f'Row {row_number}: {detail}')
+
+                done = batch[-1][0]
+                imported += count
+                failed += len(errors)
+                self.write_checkpoint(checkpoint, done)
+                rate = imported / max(time.monotonic() - start, 1e-9)
+                self.stdout.write(
+                    f'{done} rows read, {imported} imported, '
+                    f'{failed} rejected ({rate:.0f} recipes/s)'
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes, rejected {failed}.'))
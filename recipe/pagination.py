@@ -0,0 +1,90 @@
+"""
+Pagination for recipe APIs
+"""
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination over the newest recipes first"""
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class RecipeSearchCursorPagination(RecipeCursorPagination):
+    """
+    Keyset pagination over search results, best match first.
+
+    DRF cursors only keep the first ordering field and step over rows
+    tied on it with an offset, which gets slow when many results share
+    a rank. These cursors hold the (rank, id) pair, which is unique, so
+    every page starts strictly after the last row without an offset.
+    The rank must be a float8, so the cursor keeps its exact value.
+    """
+    ordering = ('-rank', '-id')
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            rank, pk = instance['rank'], instance['id']
+        else:
+            rank, pk = instance.rank, instance.id
+        return f'{rank!r}:{pk}'
+
+    def decode_position(self, position):
+        try:
+            rank, pk = position.split(':')
+            return float(rank), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor else None
+
+        if reverse:
+            queryset = queryset.order_by('rank', 'id')
+        else:
+            queryset = queryset.order_by('-rank', '-id')
+        if position is not None:
+            rank, pk = self.decode_position(position)
+            if reverse:
+                after = Q(rank__gt=rank) | Q(rank=rank, id__gt=pk)
+            else:
+                after = Q(rank__lt=rank) | Q(rank=rank, id__lt=pk)
+            queryset = queryset.filter(after)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(
+                results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = (
+                position is not None, position)
+            self.has_previous, self.previous_position = (
+                following is not None, following)
+        else:
+            self.has_next, self.next_position = (
+                following is not None, following)
+            self.has_previous, self.previous_position = (
+                position is not None, position)
+        self.display_page_controls = self.has_previous or self.has_next
+        return self.page
+
+
+class TagCursorPagination(CursorPagination):
+    """Keyset pagination over tags in reverse name order"""
+    ordering = ('-name', 'id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
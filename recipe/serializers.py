@@ -1,32 +1,200 @@
+from django.db import transaction
 from rest_framework import serializers
 from core.models import (Recipe, Tag)
+from recipe.caching import invalidate_user_responses
 
 
 class TagSerializer(serializers.ModelSerializer):
+
     class Meta:
         model = Tag
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+    def validate_name(self, value):
+        """Reject renaming a tag to a name the user already has"""
+        if self.root is not self:
+            # Nested under a recipe, where existing names are reused.
+            return value
+
+        auth_user = self.context['request'].user
+        tags = Tag.objects.filter(user=auth_user, name=value)
+        if self.instance is not None:
+            tags = tags.exclude(pk=self.instance.pk)
+        if tags.exists():
+            raise serializers.ValidationError('Tag with this name exists.')
+        return value
+
+
+class TagCountSerializer(TagSerializer):
+    """Tag list entry with the number of recipes using the tag"""
+    # Needs the queryset annotated with it.
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Write many recipes with a fixed number of queries"""
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Create recipes and their tag links in bulk"""
+        tags_per_recipe = [item.pop('tags', []) for item in validated_data]
+        recipes = Recipe.objects.bulk_create(
+            [Recipe(**item) for item in validated_data])
+
+        tags_by_name = self.child._resolve_tags(
+            tag['name'] for tags in tags_per_recipe for tag in tags)
+        self.child._add_tag_links(
+            (recipe.id, tags_by_name[tag['name']].id)
+            for recipe, tags in zip(recipes, tags_per_recipe)
+            for tag in tags
+        )
+
+        return recipes
+
+    def to_internal_value(self, data):
+        if isinstance(self.instance, list):
+            self._child_instances = iter(self.instance)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self._child_instances = None
+            self.child.instance = None
+
+    def run_child_validation(self, data):
+        """Validate each item against the instance at the same position"""
+        if getattr(self, '_child_instances', None) is not None:
+            self.child.instance = next(self._child_instances)
+        return super().run_child_validation(data)
+
+    @transaction.atomic
+    def update(self, instances, validated_data):
+        """Update recipes, pairing instances and data by position"""
+        tags_by_recipe = {}
+        fields = set()
+        for recipe, item in zip(instances, validated_data):
+            tags = item.pop('tags', None)
+            if tags is not None:
+                tags_by_recipe[recipe.id] = tags
+            for attr, value in item.items():
+                setattr(recipe, attr, value)
+                fields.add(attr)
+
+        if fields:
+            Recipe.objects.bulk_update(instances, sorted(fields))
+        if tags_by_recipe:
+            self.child._replace_tags(tags_by_recipe)
+
+        return instances
+
 
-class RecipeSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Only render the fields listed in context['fields'], if set"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted = self.context.get('fields')
+        if wanted is None:
+            return fields
+        return {
+            name: field for name, field in fields.items() if name in wanted
+        }
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True, required=False)
 
     class Meta:
         model = Recipe
         fields = ['id', 'title', 'time_minutes', 'price', 'link', 'tags']
         read_oly_fields = ['id']
+        list_serializer_class = RecipeListSerializer
+
+    def _get_auth_user(self):
+        """Return the user that owns tags, from context or the request"""
+        if 'user' in self.context:
+            return self.context['user']
+        return self.context['request'].user
+
+    def _resolve_tags(self, names):
+        """Return a name to tag mapping, creating missing tags in bulk"""
+        auth_user = self._get_auth_user()
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+
+        tags_by_name = {
+            tag.name: tag
+            for tag in Tag.objects.filter(user=auth_user, name__in=names)
+        }
+        missing = [name for name in names if name not in tags_by_name]
+        if missing:
+            # Upsert against the (user, name) constraint so concurrent
+            # requests creating the same tag do not fail, then read back
+            # the ids since ignored rows are not returned.
+            Tag.objects.bulk_create(
+                [Tag(user=auth_user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            for tag in Tag.objects.filter(user=auth_user, name__in=missing):
+                tags_by_name[tag.name] = tag
+
+        return tags_by_name
 
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting ot creating tags as needed"""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag
-            )
-            recipe.tags.add(tag_obj)
+        tags_by_name = self._resolve_tags(tag['name'] for tag in tags)
+        self._add_tag_links(
+            (recipe.id, tag.id) for tag in tags_by_name.values())
+
+    def _add_tag_links(self, links):
+        """Insert (recipe_id, tag_id) links in one statement"""
+        through = Recipe.tags.through
+        objs = [
+            through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id, tag_id in links
+        ]
+        if objs:
+            through.objects.bulk_create(objs, ignore_conflicts=True)
+            # Bulk writes send no m2m_changed, so invalidate here.
+            invalidate_user_responses(self._get_auth_user().pk)
+
+    def _replace_tags(self, tags_by_recipe):
+        """Replace tags of many recipes, only writing changed links"""
+        tags_by_name = self._resolve_tags(
+            tag['name'] for tags in tags_by_recipe.values() for tag in tags)
+        wanted = {
+            (recipe_id, tags_by_name[tag['name']].id)
+            for recipe_id, tags in tags_by_recipe.items()
+            for tag in tags
+        }
+
+        through = Recipe.tags.through
+        current = {
+            (recipe_id, tag_id): link_id
+            for link_id, recipe_id, tag_id in through.objects.filter(
+                recipe_id__in=tags_by_recipe,
+            ).values_list('id', 'recipe_id', 'tag_id')
+        }
+
+        removed = [
+            link_id for link, link_id in current.items() if link not in wanted
+        ]
+        added = wanted - current.keys()
+        if removed:
+            through.objects.filter(id__in=removed).delete()
+            if not added:
+                invalidate_user_responses(self._get_auth_user().pk)
+        self._add_tag_links(added)
 
+    def _set_tags(self, tags, recipe):
+        """Replace recipe tags, only writing the links that changed"""
+        self._replace_tags({recipe.id: tags})
+
+    @transaction.atomic
     def create(self, validated_data):
         """Create recipe"""
         tags = validated_data.pop('tags', [])
@@ -36,12 +204,12 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update recipe"""
         tags = validated_data.pop('tags', None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_tags(tags, instance)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
@@ -54,3 +222,22 @@ class RecipeDetailSerializer(RecipeSerializer):
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ['description']
+
+
+class RecipeOperationSerializer(serializers.Serializer):
+    """Serializer for one operation of a bulk recipe request."""
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'create' and 'id' in attrs:
+            raise serializers.ValidationError(
+                {'id': 'Not allowed when creating.'})
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': 'This field is required.'})
+        if attrs['op'] != 'delete' and 'data' not in attrs:
+            raise serializers.ValidationError(
+                {'data': 'This field is required.'})
+        return attrs
@@ -0,0 +1,25 @@
+"""
+Signal handlers keeping recipe API caches fresh
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag
+from recipe.caching import invalidate_user_responses
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_owner_responses(sender, instance, **kwargs):
+    """Drop cached responses of the user owning the changed object"""
+    invalidate_user_responses(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reset_new_user_responses(sender, instance, created, **kwargs):
+    """Start new users on a fresh cache version"""
+    if created:
+        invalidate_user_responses(instance.pk)
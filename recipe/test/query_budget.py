@@ -0,0 +1,27 @@
+"""
+Query budget helpers for recipe API tests.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Mixin for TestCase adding an upper bound assertion on queries."""
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        """Fail if the wrapped block runs more than `budget` queries."""
+        with CaptureQueriesContext(connections[using]) as ctx:
+            yield ctx
+
+        executed = len(ctx.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {q["sql"]}'
+                for i, q in enumerate(ctx.captured_queries, start=1)
+            )
+            self.fail(
+                f'{executed} queries executed, budget is {budget}\n{queries}'
+            )
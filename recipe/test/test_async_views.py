@@ -0,0 +1,126 @@
+"""
+Tests for the async recipe API views.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.test.test_recipe_api import create_recipe
+
+ASYNC_RECIPE_URL = reverse('recipe:async-recipe-list')
+ASYNC_TAG_URL = reverse('recipe:async-tag-list')
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def async_detail_url(recipe_id):
+    return reverse('recipe:async-recipe-detail', args=[recipe_id])
+
+
+class AsyncViewTests(TestCase):
+    """Test async views return the same data as the DRF views"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testPass123')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = f'Token {self.token.key}'
+        self.async_client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.credentials(HTTP_AUTHORIZATION=self.auth)
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipes = []
+        for i in range(3):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(tag)
+            self.recipes.append(recipe)
+        Tag.objects.create(user=self.user, name='Breakfast')
+
+    async def test_auth_required(self):
+        """Test async views reject requests without a token"""
+        res = await self.async_client.get(ASYNC_RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+    async def test_invalid_token(self):
+        """Test async views reject an unknown token"""
+        res = await self.async_client.get(
+            ASYNC_RECIPE_URL, headers={'Authorization': 'Token nope'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_write_not_allowed(self):
+        """Test async views are read only"""
+        res = await self.async_client.post(
+            ASYNC_RECIPE_URL, {}, headers={'Authorization': self.auth})
+
+        self.assertEqual(
+            res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_recipe_list_matches_sync(self):
+        """Test the async recipe list matches the DRF list"""
+        expected = self.sync_client.get(RECIPE_URL).json()
+
+        res = self.client.get(ASYNC_RECIPE_URL, HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content), expected)
+
+    def test_recipe_detail_matches_sync(self):
+        """Test the async recipe detail matches the DRF detail"""
+        recipe = self.recipes[0]
+        expected = self.sync_client.get(
+            reverse('recipe:recipe-detail', args=[recipe.id])).json()
+
+        res = self.client.get(
+            async_detail_url(recipe.id), HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content), expected)
+
+    async def test_other_user_recipe_not_found(self):
+        """Test the async detail is limited to the user's recipes"""
+        other = await get_user_model().objects.acreate(
+            email='other@example.com')
+        recipe = await Recipe.objects.acreate(
+            user=other, title='Other', time_minutes=1, price='1.00')
+
+        res = await self.async_client.get(
+            async_detail_url(recipe.id),
+            headers={'Authorization': self.auth},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tag_list_matches_sync(self):
+        """Test the async tag list matches the DRF list"""
+        expected = self.sync_client.get(TAG_URL).json()
+
+        res = self.client.get(ASYNC_TAG_URL, HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content), expected)
+
+    def test_cursor_pages(self):
+        """Test following async next links walks every recipe"""
+        seen = []
+        url = ASYNC_RECIPE_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url, HTTP_AUTHORIZATION=self.auth)
+            data = json.loads(res.content)
+            seen.extend(recipe['id'] for recipe in data['results'])
+            url = data['next']
+
+        self.assertEqual(
+            seen, [recipe.id for recipe in reversed(self.recipes)])
@@ -0,0 +1,177 @@
+"""
+Tests for per-user recipe API response caching.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.db.router import ReplicaSelector
+from core.models import Tag
+from recipe.serializers import RecipeDetailSerializer
+from recipe.test.test_recipe_api import create_recipe, detail_url
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+class ResponseCachingTests(TestCase):
+    """Test ETags and cached bodies for recipe and tag endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testPass123')
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_list_sets_etag(self):
+        """Test list responses carry a strong ETag"""
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('"'))
+
+    def test_matching_etag_returns_not_modified(self):
+        """Test a matching If-None-Match returns 304 without a body"""
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_repeat_request_served_from_cache(self):
+        """Test an unchanged repeat poll does not touch the database"""
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, first.content)
+        self.assertEqual(res['ETag'], first['ETag'])
+
+    def test_detail_cached(self):
+        """Test recipe detail responses are cached too"""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_recipe_change_invalidates(self):
+        """Test saving a recipe changes the list ETag"""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        recipe.title = 'Changed'
+        recipe.save()
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.data['results'][0]['title'], 'Changed')
+
+    def test_tag_link_change_invalidates(self):
+        """Test tag links written in bulk refresh the cached list"""
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        # Only the links change, so no recipe is saved.
+        serializer = RecipeDetailSerializer(
+            [recipe], data=[{'tags': [{'name': 'Vegan'}]}], many=True,
+            partial=True, context={'user': self.user})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Vegan')
+
+        serializer = RecipeDetailSerializer(
+            [recipe], data=[{'tags': []}], many=True,
+            partial=True, context={'user': self.user})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'], [])
+
+    def test_tag_delete_invalidates(self):
+        """Test deleting a tag refreshes the cached tag list"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAG_URL)
+
+        tag.delete()
+        res = self.client.get(TAG_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_api_write_invalidates(self):
+        """Test writes through the API refresh cached responses"""
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        self.client.patch(
+            detail_url(recipe.id),
+            {'tags': [{'name': 'Lunch'}]},
+            format='json',
+        )
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Lunch')
+
+    def test_cache_is_per_user(self):
+        """Test one user's cached list is never served to another"""
+        create_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testPass123')
+        other_client = APIClient()
+        other_client.force_authenticate(user=other)
+
+        res = other_client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    @override_settings(
+        DATABASE_ROUTERS=['core.db.router.ReplicaRouter'],
+        # The test database stands in for a replica.
+        DATABASE_REPLICAS={'ALIASES': ['default']},
+    )
+    @patch.object(ReplicaSelector, 'usable', return_value=True)
+    @patch.object(ReplicaSelector, 'start')
+    def test_replica_reads_not_cached(self, start, usable):
+        """Test a body read from a possibly lagging replica is not kept"""
+        recipe = create_recipe(user=self.user)
+        writer = APIClient()
+        writer.force_authenticate(user=self.user)
+        writer.patch(detail_url(recipe.id), {'title': 'New'})
+        reader = APIClient()
+        reader.credentials(**self.client._credentials)
+
+        reader.get(RECIPE_URL)
+        with CaptureQueriesContext(connection) as ctx:
+            res = reader.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(ctx), 0)
+        self.assertEqual(res.data['results'][0]['title'], 'New')
+        usable.assert_called_with('default')
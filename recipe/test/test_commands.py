@@ -0,0 +1,154 @@
+"""
+Test recipe management commands.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Recipe, Tag
+
+
+class ImportRecipesTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testPass123')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as output:
+            output.write(content)
+        return path
+
+    def jsonl(self, rows):
+        return ''.join(json.dumps(row) + '\n' for row in rows)
+
+    def call(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_recipes', *args, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_jsonl(self):
+        """Test importing recipes with tags from JSONL."""
+        path = self.write('recipes.jsonl', self.jsonl([
+            {'title': 'Soup', 'time_minutes': 10, 'price': '2.50',
+             'tags': ['Lunch', 'Vegan']},
+            {'title': 'Toast', 'time_minutes': 5, 'price': '1.00',
+             'tags': [{'name': 'Lunch'}]},
+        ]))
+
+        out, err = self.call(path, user='test@example.com')
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        soup = Recipe.objects.get(title='Soup')
+        self.assertEqual(
+            set(soup.tags.values_list('name', flat=True)), {'Lunch', 'Vegan'})
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertIn('Imported 2 recipes', out)
+
+    def test_import_csv(self):
+        """Test importing the CSV layout produced by the export."""
+        path = self.write(
+            'recipes.csv',
+            'id,title,description,time_minutes,price,link,tags\n'
+            '7,Soup,Hot,10,2.50,,Lunch;Vegan\n'
+        )
+
+        self.call(path, user='test@example.com')
+
+        soup = Recipe.objects.get(user=self.user)
+        self.assertEqual(soup.description, 'Hot')
+        self.assertEqual(soup.tags.count(), 2)
+
+    def test_csv_short_and_long_rows(self):
+        """Test short CSV rows import and long ones report their line."""
+        path = self.write(
+            'recipes.csv',
+            'title,time_minutes,price,tags\n'
+            'Soup,10,2.50\n'
+            '"Two\nline toast",5,1.00,Lunch,extra\n'
+            'Stew,30\n'
+        )
+
+        out, err = self.call(path, user='test@example.com')
+
+        soup = Recipe.objects.get(user=self.user)
+        self.assertEqual(soup.title, 'Soup')
+        self.assertEqual(soup.tags.count(), 0)
+        self.assertIn('Row 2: Line 4: more values', err)
+        self.assertIn('Row 3:', err)
+        self.assertIn('price', err)
+        self.assertIn('rejected 2', out)
+
+    def test_invalid_rows_rejected(self):
+        """Test rows failing serializer validation are reported."""
+        path = self.write('recipes.jsonl', self.jsonl([
+            {'title': 'Soup', 'time_minutes': 10, 'price': '2.50'},
+            {'title': 'No time', 'price': '2.50'},
+            {'title': 'Bad price', 'time_minutes': 1, 'price': '12345.00'},
+            {'title': 'Stranger', 'time_minutes': 1, 'price': '1.00',
+             'user': 'nobody@example.com'},
+        ]) + '{not json\n')
+
+        out, err = self.call(path, user='test@example.com')
+
+        self.assertEqual(Recipe.objects.count(), 1)
+        for row in range(2, 6):
+            self.assertIn(f'Row {row}:', err)
+        self.assertIn('rejected 4', out)
+
+    def test_rows_assigned_to_their_user(self):
+        """Test the user column picks the owner of each row."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testPass123')
+        path = self.write('recipes.jsonl', self.jsonl([
+            {'title': 'Mine', 'time_minutes': 1, 'price': '1.00',
+             'tags': ['Shared']},
+            {'title': 'Theirs', 'time_minutes': 1, 'price': '1.00',
+             'tags': ['Shared'], 'user': 'other@example.com'},
+        ]))
+
+        self.call(path, user='test@example.com')
+
+        self.assertEqual(Recipe.objects.get(user=other).title, 'Theirs')
+        self.assertEqual(Tag.objects.filter(name='Shared').count(), 2)
+
+    def test_resume_from_checkpoint(self):
+        """Test a checkpoint skips rows already committed."""
+        rows = [
+            {'title': f'Recipe {i}', 'time_minutes': 1, 'price': '1.00'}
+            for i in range(5)
+        ]
+        path = self.write('recipes.jsonl', self.jsonl(rows))
+        checkpoint = self.write('import.checkpoint', '3')
+
+        self.call(
+            path, user='test@example.com', checkpoint=checkpoint,
+            batch_size=1)
+
+        titles = list(Recipe.objects.values_list('title', flat=True))
+        self.assertEqual(sorted(titles), ['Recipe 3', 'Recipe 4'])
+        with open(checkpoint) as saved:
+            self.assertEqual(saved.read(), '5')
+
+    def test_batches_use_bulk_inserts(self):
+        """Test a batch costs a fixed number of queries."""
+        path = self.write('recipes.jsonl', self.jsonl([
+            {'title': f'Recipe {i}', 'time_minutes': 1, 'price': '1.00',
+             'tags': [f'Tag {i % 3}']}
+            for i in range(100)
+        ]))
+
+        with self.assertNumQueries(10):
+            self.call(path, user='test@example.com')
+
+        self.assertEqual(Recipe.objects.count(), 100)
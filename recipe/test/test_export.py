@@ -0,0 +1,91 @@
+"""
+Tests for the streaming recipe export.
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from recipe.export import stream_ndjson
+from recipe.test.query_budget import QueryBudgetMixin
+from recipe.test.test_recipe_api import create_recipe
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class RecipeExportTests(QueryBudgetMixin, TestCase):
+    """Test exporting recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(user=self.user)
+
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+        self.recipes[0].tags.add(lunch, vegan)
+
+    def test_export_ndjson(self):
+        """Test the default export streams one JSON object per line"""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            [recipe.id for recipe in self.recipes],
+        )
+        self.assertEqual(rows[0]['tags'], ['Lunch', 'Vegan'])
+        self.assertEqual(rows[0]['price'], '5.25')
+        self.assertEqual(rows[1]['tags'], [])
+
+    def test_export_csv(self):
+        """Test exporting as CSV with a header row"""
+        res = self.client.get(EXPORT_URL, {'type': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['title'], 'Recipe 0')
+        self.assertEqual(rows[0]['tags'], 'Lunch;Vegan')
+
+    def test_export_unknown_type(self):
+        """Test an unsupported export type is rejected"""
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_limited_to_user(self):
+        """Test the export only contains the user's recipes"""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testPass123')
+        create_recipe(user=other)
+
+        res = self.client.get(EXPORT_URL)
+
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+
+    def test_tags_fetched_per_chunk(self):
+        """Test queries grow with chunks, not with recipes"""
+        with self.assertMaxQueries(6):
+            chunks = list(stream_ndjson(self.user, chunk_size=2))
+
+        self.assertEqual(len(chunks), 3)
@@ -1,11 +1,17 @@
 from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import FloatField, Value
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework .test import APIClient
+from rest_framework.request import Request
+from rest_framework .test import APIClient, APIRequestFactory
 
 from core.models import (
     Recipe,
@@ -16,8 +22,15 @@ from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer
 )
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeSearchCursorPagination,
+)
+from recipe.views import RecipeViewSet
+from recipe.test.query_budget import QueryBudgetMixin
 
 RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
 
 
 def create_user(**params):
@@ -75,7 +88,7 @@ class PrivateRecipeApiTest(TestCase):
         recipe = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipe, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         other_user = create_user(
@@ -90,7 +103,7 @@ class PrivateRecipeApiTest(TestCase):
         recipe = Recipe.objects.filter(user=self.user)
         serializer = RecipeSerializer(recipe, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         """Test get recipe detail"""
@@ -283,3 +296,720 @@ class PrivateRecipeApiTest(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.tags.count(), 0)
+
+
+class RecipePaginationTest(QueryBudgetMixin, TestCase):
+    """Test cursor pagination of the recipe list"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_pages_follow_cursor(self):
+        """Test walking the next links returns every recipe once"""
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+
+        seen = []
+        url = RECIPE_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(recipe['id'] for recipe in res.data['results'])
+            url = res.data['next']
+
+        expected = [recipe.id for recipe in reversed(recipes)]
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped(self):
+        """Test a client cannot request more than the maximum page size"""
+        paginator = RecipeCursorPagination()
+        for i in range(paginator.max_page_size + 1):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+
+        res = self.client.get(RECIPE_URL, {'page_size': 10000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), paginator.max_page_size)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_no_count_query(self):
+        """Test paginating does not count the whole collection"""
+        create_recipe(user=self.user)
+
+        with self.assertMaxQueries(2) as ctx:
+            self.client.get(RECIPE_URL)
+
+        for query in ctx.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+
+class RecipeQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Test recipe endpoints stay within their query budget"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(user=self.user)
+
+    def _create_recipes_with_tags(self, count):
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        recipes = []
+        for i in range(count):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(*tags)
+            recipes.append(recipe)
+        return recipes
+
+    def test_list_recipes_query_budget(self):
+        """Test listing recipes does not issue a query per recipe"""
+        self._create_recipes_with_tags(10)
+
+        with self.assertMaxQueries(2):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(len(res.data['results'][0]['tags']), 3)
+
+    def test_recipe_detail_query_budget(self):
+        """Test recipe detail loads tags in a single query"""
+        recipe = self._create_recipes_with_tags(1)[0]
+
+        with self.assertMaxQueries(2):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 3)
+
+    def test_create_recipe_with_tags_query_budget(self):
+        """Test tag resolution cost does not grow with the number of tags"""
+        Tag.objects.create(user=self.user, name='Tag 0')
+        payload = {
+            'title': 'sample recipe title',
+            'time_minutes': 22,
+            'price': Decimal('5.25'),
+            'tags': [{'name': f'Tag {i}'} for i in range(20)],
+        }
+
+        with self.assertMaxQueries(8):
+            res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 20)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 20)
+        self.assertEqual(len(res.data['tags']), 20)
+
+    def test_update_same_tags_does_not_write_links(self):
+        """Test re-sending the same tags leaves the through table alone"""
+        recipe = self._create_recipes_with_tags(1)[0]
+        payload = {'tags': [{'name': f'Tag {i}'} for i in range(3)]}
+
+        with self.assertMaxQueries(10) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        through_table = Recipe.tags.through._meta.db_table
+        link_writes = [
+            q['sql'] for q in ctx.captured_queries
+            if through_table in q['sql']
+            and not q['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(link_writes, [])
+        self.assertEqual(recipe.tags.count(), 3)
+
+    def test_update_tags_only_writes_changed_links(self):
+        """Test changing tags only deletes and inserts the difference"""
+        recipe = self._create_recipes_with_tags(1)[0]
+        links = Recipe.tags.through.objects.filter(recipe=recipe)
+        kept_ids = set(links.filter(
+            tag__name__in=['Tag 0', 'Tag 1']).values_list('id', flat=True))
+        payload = {'tags': [{'name': 'Tag 0'}, {'name': 'Tag 1'},
+                            {'name': 'Tag 9'}]}
+
+        res = self.client.patch(detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = set(recipe.tags.values_list('name', flat=True))
+        self.assertEqual(names, {'Tag 0', 'Tag 1', 'Tag 9'})
+        self.assertTrue(kept_ids <= set(links.values_list('id', flat=True)))
+
+
+class RecipeBulkApiTest(QueryBudgetMixin, TestCase):
+    """Test the bulk recipe endpoint"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_update_delete(self):
+        """Test a batch mixing every operation is applied"""
+        to_update = create_recipe(user=self.user, title='Old title')
+        to_delete = create_recipe(user=self.user)
+        payload = [
+            {'op': 'create', 'data': {
+                'title': 'New recipe', 'time_minutes': 10, 'price': '2.50',
+                'tags': [{'name': 'Lunch'}, {'name': 'Vegan'}],
+            }},
+            {'op': 'update', 'id': to_update.id, 'data': {
+                'title': 'New title', 'tags': [{'name': 'Lunch'}],
+            }},
+            {'op': 'delete', 'id': to_delete.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual(
+            [result['status'] for result in results], [201, 200, 204])
+        created = Recipe.objects.get(id=results[0]['id'])
+        self.assertEqual(created.user, self.user)
+        self.assertEqual(
+            set(created.tags.values_list('name', flat=True)),
+            {'Lunch', 'Vegan'},
+        )
+        to_update.refresh_from_db()
+        self.assertEqual(to_update.title, 'New title')
+        self.assertEqual(
+            list(to_update.tags.values_list('name', flat=True)), ['Lunch'])
+        self.assertFalse(Recipe.objects.filter(id=to_delete.id).exists())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_invalid_item_writes_nothing(self):
+        """Test one invalid item rejects the whole batch"""
+        recipe = create_recipe(user=self.user)
+        payload = [
+            {'op': 'create', 'data': {
+                'title': 'New recipe', 'time_minutes': 10, 'price': '2.50',
+            }},
+            {'op': 'create', 'data': {'title': 'Missing fields'}},
+            {'op': 'delete', 'id': recipe.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        results = res.data['results']
+        self.assertEqual(results[0]['errors'], {})
+        self.assertIn('time_minutes', results[1]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_other_user_recipe_not_found(self):
+        """Test a batch cannot touch another user's recipes"""
+        other_user = create_user(
+            email='other@example.com', password='testPass123')
+        recipe = create_recipe(user=other_user)
+        payload = [{'op': 'delete', 'id': recipe.id}]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data['results'][0]['errors'])
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_create_with_id_rejected(self):
+        """Test create operations cannot name an id"""
+        recipe = create_recipe(user=self.user)
+        payload = [{'op': 'create', 'id': recipe.id, 'data': {
+            'title': 'New recipe', 'time_minutes': 10, 'price': '2.50',
+        }}]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['results'][0]['op'], 'create')
+        self.assertIn('id', res.data['results'][0]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_body_not_a_list(self):
+        """Test request wide errors come in the same shape as item ones"""
+        res = self.client.post(BULK_URL, {'op': 'create'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['results'], [])
+        self.assertIn('non_field_errors', res.data)
+
+    def test_bulk_delete_invalidates_once(self):
+        """Test deleting many recipes bumps the cache version once"""
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+        payload = [{'op': 'delete', 'id': recipe.id} for recipe in recipes]
+
+        with patch('recipe.caching._bump_user_version') as bump, \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Once right away and once on commit.
+        self.assertEqual(bump.call_count, 2)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_updates_validated_per_item(self):
+        """Test update errors are reported at their own position"""
+        first = create_recipe(user=self.user, title='First')
+        second = create_recipe(user=self.user, title='Second')
+        payload = [
+            {'op': 'update', 'id': first.id, 'data': {'title': 'Renamed'}},
+            {'op': 'update', 'id': second.id,
+             'data': {'time_minutes': 'soon'}},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        results = res.data['results']
+        self.assertEqual(results[0]['errors'], {})
+        self.assertIn('time_minutes', results[1]['errors'])
+        first.refresh_from_db()
+        self.assertEqual(first.title, 'First')
+
+    def test_bulk_updates_applied_in_order(self):
+        """Test each update is paired with the recipe it names"""
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(3)
+        ]
+        payload = [
+            {'op': 'update', 'id': recipe.id,
+             'data': {'title': f'Renamed {recipe.id}'}}
+            for recipe in reversed(recipes)
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for recipe in recipes:
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.title, f'Renamed {recipe.id}')
+
+    def test_bulk_query_count_independent_of_size(self):
+        """Test a batch of creates costs a fixed number of queries"""
+        payload = [
+            {'op': 'create', 'data': {
+                'title': f'Recipe {i}', 'time_minutes': 10, 'price': '2.50',
+                'tags': [{'name': f'Tag {i % 5}'}, {'name': 'Shared'}],
+            }}
+            for i in range(50)
+        ]
+
+        with self.assertMaxQueries(10):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 50)
+        self.assertEqual(Recipe.tags.through.objects.count(), 100)
+
+
+class RecipeTagFilterTest(QueryBudgetMixin, TestCase):
+    """Test filtering the recipe list by tags"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.both = create_recipe(user=self.user, title='Salad')
+        self.both.tags.add(self.vegan, self.quick)
+        self.vegan_only = create_recipe(user=self.user, title='Curry')
+        self.vegan_only.tags.add(self.vegan)
+        self.untagged = create_recipe(user=self.user, title='Toast')
+
+    def get_ids(self, params):
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_filter_any_tag(self):
+        """Test ?tags returns recipes with at least one of the tags"""
+        ids = self.get_ids({'tags': f'{self.vegan.id},{self.quick.id}'})
+
+        self.assertEqual(ids, [self.vegan_only.id, self.both.id])
+
+    def test_filter_all_tags(self):
+        """Test tags_match=all returns recipes carrying every tag"""
+        ids = self.get_ids({
+            'tags': f'{self.vegan.id},{self.quick.id}',
+            'tags_match': 'all',
+        })
+
+        self.assertEqual(ids, [self.both.id])
+
+    def test_filter_ignores_other_users_recipes(self):
+        """Test the filter keeps results scoped to the user"""
+        other_user = create_user(
+            email='other@example.com', password='testPass123')
+        recipe = create_recipe(user=other_user)
+        recipe.tags.add(self.vegan)
+
+        ids = self.get_ids({'tags': str(self.vegan.id)})
+
+        self.assertNotIn(recipe.id, ids)
+
+    def test_invalid_filter_rejected(self):
+        """Test malformed ids and match modes return 400"""
+        for params in (
+            {'tags': 'vegan'},
+            {'tags': str(self.vegan.id), 'tags_match': 'some'},
+        ):
+            res = self.client.get(RECIPE_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_needs_no_extra_queries(self):
+        """Test filtering by many tags still costs one list query"""
+        with self.assertMaxQueries(2):
+            self.get_ids({
+                'tags': f'{self.vegan.id},{self.quick.id}',
+                'tags_match': 'all',
+            })
+
+
+class RecipeValuesListTest(QueryBudgetMixin, TestCase):
+    """Test the values() list path matches RecipeSerializer"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(self.user)
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        quick = Tag.objects.create(user=self.user, name='Quick')
+        self.tag_ids = f'{vegan.id},{quick.id}'
+        # Created and linked out of name order.
+        self.ordered_tags = [
+            {'id': quick.id, 'name': 'Quick'},
+            {'id': vegan.id, 'name': 'Vegan'},
+        ]
+        for i, price in enumerate(['5', '10.50', '0.05', '999.99']):
+            recipe = create_recipe(
+                user=self.user, title=f'Recipe {i}', price=Decimal(price),
+                link='' if i % 2 else f'https://example.com/{i}')
+            recipe.tags.add(*[vegan, quick][:i % 3])
+
+    def get_pages(self, params):
+        """Return every page of the list, following next links"""
+        pages = []
+        url, data = RECIPE_URL, params
+        while url:
+            cache.clear()
+            res = self.client.get(url, data)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.json())
+            url, data = res.data['next'], None
+        return pages
+
+    def test_same_output_as_serializer(self):
+        """Test both list paths return identical pages"""
+        for params in (
+            {}, {'page_size': 3}, {'tags': self.tag_ids},
+            {'fields': 'title,price', 'page_size': 3},
+        ):
+            fast = self.get_pages(params)
+            with patch.object(
+                    RecipeViewSet, 'use_values_fast_path', False):
+                slow = self.get_pages(params)
+
+            self.assertEqual(fast, slow)
+
+    def test_tags_ordered_by_name(self):
+        """Test both list paths order a recipe's tags by name, then id"""
+        for fast_path in (True, False):
+            with patch.object(
+                    RecipeViewSet, 'use_values_fast_path', fast_path):
+                results = self.get_pages({})[0]['results']
+
+            self.assertEqual(
+                [result['tags'] for result in results],
+                [[], self.ordered_tags, self.ordered_tags[1:], []],
+            )
+
+    def test_values_path_query_budget(self):
+        """Test the values path runs one recipe and one tags query"""
+        with self.assertMaxQueries(2):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 4)
+
+
+class RecipeSparseFieldsTest(QueryBudgetMixin, TestCase):
+    """Test ?fields= narrows the queries and the response"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(
+            user=self.user, description='A very long description')
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+    def test_list_without_tags_skips_tag_query(self):
+        """Test listing only titles selects no other columns or tags"""
+        with self.assertMaxQueries(1) as ctx:
+            res = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': self.recipe.title}],
+        )
+        sql = ctx.captured_queries[0]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('"price"', sql)
+
+    def test_list_with_tags(self):
+        """Test requested tags are still loaded in bulk"""
+        with self.assertMaxQueries(2):
+            res = self.client.get(RECIPE_URL, {'fields': 'tags'})
+
+        tag = self.recipe.tags.get()
+        self.assertEqual(
+            res.data['results'], [{'tags': [{'id': tag.id, 'name': 'Vegan'}]}])
+
+    def test_retrieve_fields(self):
+        """Test the detail view renders only the requested fields"""
+        with self.assertMaxQueries(1) as ctx:
+            res = self.client.get(
+                detail_url(self.recipe.id), {'fields': 'title,description'})
+
+        self.assertEqual(res.data, {
+            'title': self.recipe.title,
+            'description': 'A very long description',
+        })
+        self.assertNotIn('search_vector', ctx.captured_queries[0]['sql'])
+
+    def test_retrieve_only_tags(self):
+        """Test asking for tags alone loads no other recipe columns"""
+        with self.assertMaxQueries(2) as ctx:
+            res = self.client.get(
+                detail_url(self.recipe.id), {'fields': 'tags'})
+
+        self.assertEqual(res.data, {'tags': [
+            {'id': self.recipe.tags.get().id, 'name': 'Vegan'}]})
+        sql = ctx.captured_queries[0]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('search_vector', sql)
+
+    def test_unknown_field_rejected(self):
+        """Test unknown field names return 400"""
+        res = self.client.get(RECIPE_URL, {'fields': 'title,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_writes_ignore_fields(self):
+        """Test ?fields= does not narrow write responses"""
+        res = self.client.patch(
+            detail_url(self.recipe.id) + '?fields=title', {'title': 'New'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('description', res.data)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Plans checked on Postgres')
+class RecipeTagFilterPlanTest(TestCase):
+    """Test tag filters probe the link table indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(
+            email='test@example.com', password='testPass123')
+        tags = Tag.objects.bulk_create(
+            Tag(user=cls.user, name=f'Tag {i}') for i in range(200))
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=cls.user, title=f'Recipe {i}', time_minutes=5,
+                   price=Decimal('1.00'))
+            for i in range(5000)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for i, recipe in enumerate(recipes)
+            for tag in tags[i % 200:i % 200 + 3]
+        )
+        cls.tag_ids = ','.join(str(tag.id) for tag in tags[:3])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_recipe, core_recipe_tags')
+
+    def get_plan(self, params):
+        request = Request(APIRequestFactory().get(RECIPE_URL, params))
+        request.user = self.user
+        view = RecipeViewSet(
+            action='list', request=request, format_kwarg=None)
+        return view.get_queryset().explain()
+
+    def test_any_tag_filter_plan(self):
+        """Test any-of filtering is a semi join over the link indexes"""
+        plan = self.get_plan({'tags': self.tag_ids})
+
+        self.assertNotIn('Unique', plan)
+        self.assertNotIn('Seq Scan on core_recipe_tags', plan)
+
+    def test_all_tags_filter_plan(self):
+        """Test all-of filtering probes the link indexes per tag"""
+        plan = self.get_plan({'tags': self.tag_ids, 'tags_match': 'all'})
+
+        self.assertNotIn('Unique', plan)
+        self.assertNotIn('Seq Scan on core_recipe_tags', plan)
+
+
+class RecipeSearchPaginationTest(TestCase):
+    """Test search pages continue after the (rank, id) of the last row"""
+
+    def setUp(self):
+        user = create_user(email='test@example.com', password='testPass123')
+        self.ids = sorted(
+            (create_recipe(user=user).id for _ in range(7)), reverse=True)
+        # Every row ties on rank, the worst case for DRF cursors.
+        self.queryset = Recipe.objects.filter(user=user).annotate(
+            rank=Value(0.25, output_field=FloatField()))
+
+    def get_page(self, url):
+        paginator = RecipeSearchCursorPagination()
+        paginator.page_size = 3
+        page = paginator.paginate_queryset(
+            self.queryset, Request(APIRequestFactory().get(url)))
+        response = paginator.get_paginated_response(
+            [recipe.id for recipe in page])
+        return response.data
+
+    def test_ties_paged_by_id_without_offsets(self):
+        pages, url = [], RECIPE_URL
+        while url:
+            data = self.get_page(url)
+            pages.append(data['results'])
+            url = data['next']
+            if url:
+                cursor = Request(APIRequestFactory().get(url))
+                decoded = RecipeSearchCursorPagination().decode_cursor(
+                    cursor)
+                self.assertEqual(decoded.offset, 0)
+                self.assertTrue(decoded.position.startswith('0.25:'))
+
+        self.assertEqual(
+            pages, [self.ids[:3], self.ids[3:6], self.ids[6:]])
+
+    def test_previous_page(self):
+        first = self.get_page(RECIPE_URL)
+        second = self.get_page(first['next'])
+
+        self.assertEqual(
+            self.get_page(second['previous'])['results'], self.ids[:3])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Search needs Postgres')
+class RecipeSearchApiTest(TestCase):
+    """Test full text search over recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com', password='testPass123')
+        self.client.force_authenticate(self.user)
+
+    def test_search_matches_title_and_description(self):
+        """Test search finds words in the title or the description"""
+        by_title = create_recipe(
+            user=self.user, title='Lemon curd', description='Tangy')
+        by_description = create_recipe(
+            user=self.user, title='Tart', description='Uses lemons')
+        create_recipe(user=self.user, title='Beef stew')
+
+        res = self.client.get(RECIPE_URL, {'search': 'lemon'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [by_title.id, by_description.id])
+
+    def test_search_vector_follows_updates(self):
+        """Test an edited recipe is found by its new title"""
+        recipe = create_recipe(user=self.user, title='Plain toast')
+        self.client.patch(detail_url(recipe.id), {'title': 'Garlic toast'})
+
+        res = self.client.get(RECIPE_URL, {'search': 'garlic'})
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [recipe.id])
+
+    def test_search_limited_to_user(self):
+        """Test search never returns other users' recipes"""
+        other_user = create_user(
+            email='other@example.com', password='testPass123')
+        create_recipe(user=other_user, title='Lemon pie')
+
+        res = self.client.get(RECIPE_URL, {'search': 'lemon'})
+
+        self.assertEqual(res.data['results'], [])
+
+    def follow_pages(self, params):
+        """Return the ids of every page, failing on a repeated cursor"""
+        found, urls, url = [], set(), RECIPE_URL
+        while url:
+            self.assertNotIn(url, urls)
+            urls.add(url)
+            res = self.client.get(url, params)
+            found.extend(item['id'] for item in res.json()['results'])
+            url, params = res.json()['next'], None
+        return found
+
+    def test_search_pages_through_ties(self):
+        """Test equally ranked results page by id, each once"""
+        ids = sorted(
+            (create_recipe(user=self.user, title='Lemon cake').id
+             for _ in range(5)), reverse=True)
+
+        found = self.follow_pages({'search': 'lemon', 'page_size': 2})
+
+        self.assertEqual(found, ids)
+
+    def test_search_pages_through_ranks(self):
+        """Test following next over distinct ranks returns each id once"""
+        ids = [
+            create_recipe(
+                user=self.user, title=f'Lemon {i}',
+                description=' '.join(['lemon'] * i)).id
+            for i in range(7)
+        ] + [create_recipe(user=self.user, title='Lemon').id]
+
+        found = self.follow_pages({'search': 'lemon', 'page_size': 3})
+
+        self.assertEqual(sorted(found), sorted(ids))
+        self.assertEqual(len(found), len(set(found)))
+
+    def test_trigger_only_watches_text_columns(self):
+        """Test price or time updates do not recompute the tsvector"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_get_triggerdef(oid) FROM pg_trigger '
+                "WHERE tgname = 'core_recipe_search_vector_trigger'")
+            (definition,) = cursor.fetchone()
+
+        self.assertIn('UPDATE OF title, description', definition)
+
+    def test_search_uses_index(self):
+        """Test search filters on the GIN indexed search_vector"""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Recipe._meta.db_table)
+        index = constraints['core_recipe_user_search_gin']
+        sql = str(Recipe.objects.filter(
+            user=self.user, search_vector='lemon').query)
+
+        self.assertEqual(index['type'], 'gin')
+        self.assertEqual(index['columns'], ['user_id', 'search_vector'])
+        self.assertIn('"core_recipe"."search_vector" @@', sql)
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.test import TestCase
@@ -5,8 +7,10 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Tag
+from core import schema
+from core.models import Recipe, Tag
 from recipe.serializers import TagSerializer
+from recipe.test.query_budget import QueryBudgetMixin
 
 TAG_URL = reverse('recipe:tag-list')
 
@@ -33,7 +37,7 @@ class PublicTagApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateTagApiTests(TestCase):
+class PrivateTagApiTests(QueryBudgetMixin, TestCase):
     """Test authenticated api required"""
 
     def setUp(self) -> None:
@@ -51,7 +55,7 @@ class PrivateTagApiTests(TestCase):
         tags = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(serializer.data, res.data)
+        self.assertEqual(serializer.data, res.data['results'])
 
     def test_tags_limited_to_user(self):
         user2 = create_user(email='test123@example.com', password='test123')
@@ -61,9 +65,25 @@ class PrivateTagApiTests(TestCase):
         res = self.client.get(TAG_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
+
+    def test_tags_paginated_by_cursor(self):
+        """Test tag pages follow the name ordering across cursors"""
+        names = ['Alpha', 'Bravo', 'Charlie', 'Delta', 'Echo']
+        for name in names:
+            Tag.objects.create(user=self.user, name=name)
+
+        seen = []
+        url = TAG_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(tag['name'] for tag in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(seen, sorted(names, reverse=True))
 
     def test_update_tag(self):
         """Test updating a tag"""
@@ -78,6 +98,17 @@ class PrivateTagApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name_error(self):
+        """Test renaming a tag to an existing name returns an error"""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='After Dinner')
+
+        res = self.client.patch(details_url(tag.id), {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'After Dinner')
+
     def test_delete_tag(self):
         """Test delete tag"""
 
@@ -88,3 +119,82 @@ class PrivateTagApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         tags = Tag.objects.filter(user=self.user)
         self.assertFalse(tags.exists())
+
+    def test_list_tags_query_budget(self):
+        """Test listing tags runs a single query"""
+        for i in range(10):
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+
+        with self.assertMaxQueries(1):
+            res = self.client.get(TAG_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+
+    def create_recipe(self, title, *tags):
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_minutes=5,
+            price=Decimal('4.50'))
+        recipe.tags.add(*tags)
+        return recipe
+
+    def test_filter_assigned_only(self):
+        """Test assigned_only lists tags used by at least one recipe"""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Lunch')
+        self.create_recipe('Eggs', breakfast)
+        self.create_recipe('Pancakes', breakfast)
+
+        res = self.client.get(TAG_URL, {'assigned_only': 1})
+
+        self.assertEqual(
+            res.data['results'], [{'id': breakfast.id, 'name': 'Breakfast'}])
+
+    def test_recipe_count(self):
+        """Test recipe_count=1 adds usage counts to every tag"""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+        self.create_recipe('Eggs', breakfast)
+        self.create_recipe('Brunch', breakfast, lunch)
+        unused = Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.client.get(TAG_URL, {'recipe_count': 1})
+
+        counts = {tag['id']: tag['recipe_count']
+                  for tag in res.data['results']}
+        self.assertEqual(counts, {breakfast.id: 2, lunch.id: 1, unused.id: 0})
+
+    def test_recipe_count_assigned_only_single_query(self):
+        """Test counting and filtering many tags takes one query"""
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(10)
+        ]
+        for i in range(5):
+            self.create_recipe(f'Recipe {i}', *tags[:i + 1])
+
+        with self.assertMaxQueries(1):
+            res = self.client.get(
+                TAG_URL, {'assigned_only': 1, 'recipe_count': 1})
+
+        counts = [tag['recipe_count'] for tag in res.data['results']]
+        self.assertEqual(sorted(counts), [1, 2, 3, 4, 5])
+
+    def test_recipe_count_optional_in_schema(self):
+        """Test only the documented query param adds recipe_count"""
+        schema.clear_schema()
+        self.addCleanup(schema.clear_schema)
+
+        data = schema.get_schema().data
+
+        tag = data['components']['schemas']['Tag']
+        self.assertNotIn('recipe_count', tag['properties'])
+        params = [param['name']
+                  for param in data['paths'][TAG_URL]['get']['parameters']]
+        self.assertIn('recipe_count', params)
+
+    def test_invalid_flag_rejected(self):
+        """Test flags other than 0 or 1 return 400"""
+        res = self.client.get(TAG_URL, {'assigned_only': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,7 +1,7 @@
 from django.urls import (path, include)
 
 from rest_framework.routers import DefaultRouter
-from recipe import views
+from recipe import async_views, views
 
 router = DefaultRouter()
 router.register('recipes', views.RecipeViewSet)
@@ -10,5 +10,16 @@ router.register('tags', views.TagViewSet)
 app_name = 'recipe'
 
 urlpatterns = [
+    path(
+        'async/recipes/',
+        async_views.recipe_list,
+        name='async-recipe-list'
+    ),
+    path(
+        'async/recipes/<int:pk>/',
+        async_views.recipe_detail,
+        name='async-recipe-detail'
+    ),
+    path('async/tags/', async_views.tag_list, name='async-tag-list'),
     path('', include(router.urls))
 ]
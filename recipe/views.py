@@ -1,20 +1,136 @@
-from rest_framework import (viewsets, mixins)
-from rest_framework.authentication import TokenAuthentication
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
+from django.db.models import (
+    Count, Exists, F, FloatField, OuterRef, Prefetch)
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    OpenApiParameter,
+    extend_schema,
+    extend_schema_view,
+)
+from rest_framework import (viewsets, mixins, status)
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from core.authentication import CachedTokenAuthentication
 from core.models import (Recipe, Tag)
 from recipe import serializers
+from recipe.export import EXPORT_FORMATS
+from recipe.fastpath import TAG_ORDERING, RecipeValuesListMixin
+from recipe.caching import (
+    CachedResponseMixin,
+    batched_invalidation,
+)
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeSearchCursorPagination,
+    TagCursorPagination,
+)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedResponseMixin,
+                    RecipeValuesListMixin,
+                    viewsets.ModelViewSet):
     """view for manage recipe APIs"""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    use_values_fast_path = True
+    bulk_max_operations = 1000
+    max_filter_tags = 50
+
+    def _params_to_ints(self, name, value):
+        """Convert a comma separated query param to a list of integers"""
+        try:
+            ids = [int(str_id) for str_id in value.split(',') if str_id]
+        except ValueError:
+            raise ValidationError({name: ['Expected comma separated ids.']})
+        if len(ids) > self.max_filter_tags:
+            raise ValidationError(
+                {name: [f'Filter by at most {self.max_filter_tags} ids.']})
+        return ids
+
+    def _filter_tags(self, queryset):
+        """Filter by ?tags=1,2 with EXISTS over the recipe/tag links"""
+        params = self.request.query_params
+        tag_ids = set(self._params_to_ints('tags', params.get('tags', '')))
+        if not tag_ids:
+            return queryset
+
+        match = params.get('tags_match', 'any')
+        links = Recipe.tags.through.objects.filter(recipe_id=OuterRef('pk'))
+        if match == 'any':
+            return queryset.filter(Exists(links.filter(tag_id__in=tag_ids)))
+        if match == 'all':
+            # One probe of the (recipe_id, tag_id) unique index per tag
+            # instead of a join that fans out and needs distinct().
+            for tag_id in sorted(tag_ids):
+                queryset = queryset.filter(
+                    Exists(links.filter(tag_id=tag_id)))
+            return queryset
+        raise ValidationError({'tags_match': ['Choose any or all.']})
+
+    def _search_terms(self):
+        if self.action != 'list':
+            return None
+        return self.request.query_params.get('search', '').strip() or None
+
+    @property
+    def paginator(self):
+        """Page search results by rank instead of by id"""
+        if self._search_terms() and not hasattr(self, '_paginator'):
+            self._paginator = RecipeSearchCursorPagination()
+        return super().paginator
+
+    def _read_fields(self):
+        """Return the fields to render for reads, from ?fields= if given"""
+        if self.action not in ('list', 'retrieve'):
+            return None
+        available = self.get_serializer_class().Meta.fields
+        value = self.request.query_params.get('fields')
+        if not value:
+            return available
+
+        names = {name.strip() for name in value.split(',')} - {''}
+        unknown = sorted(names.difference(available))
+        if unknown:
+            raise ValidationError(
+                {'fields': [f'Unknown fields: {", ".join(unknown)}.']})
+        return [name for name in available if name in names]
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        """Filter queryset for authenticated user and load tags in bulk."""
+        queryset = self.queryset.filter(
+            user=self.request.user
+        ).order_by('-id')
+        fields = self._read_fields()
+        if fields is not None:
+            # Reads only load the rendered columns, never search_vector.
+            # Always name id, as an empty only() would load every column.
+            queryset = queryset.only(
+                'id', *[name for name in fields if name != 'tags'])
+        if fields is None or 'tags' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'tags', queryset=Tag.objects.order_by(*TAG_ORDERING)))
+        queryset = self._filter_tags(queryset)
+
+        terms = self._search_terms()
+        if terms:
+            query = SearchQuery(
+                terms, config='english', search_type='websearch')
+            queryset = queryset.filter(search_vector=query).annotate(
+                # ts_rank is a float4 and reaches Python rounded. As a
+                # float8 the cursor keeps the exact value it filters on.
+                rank=Cast(
+                    SearchRank(F('search_vector'), query), FloatField()),
+            ).order_by('-rank', '-id')
+        return queryset
 
     def get_serializer_class(self):
         """Override the serializer class"""
@@ -24,19 +140,188 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self._read_fields()
+        if fields is not None:
+            context['fields'] = fields
+        return context
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def _validate_bulk(self, operations, recipes):
+        """Validate bulk operations, returning serializers and errors"""
+        context = self.get_serializer_context()
+        errors = [{} for _ in operations]
+        seen = set()
+        for index, operation in enumerate(operations):
+            recipe_id = operation.get('id')
+            if recipe_id is None:
+                continue
+            if recipe_id not in recipes:
+                errors[index]['id'] = ['Not found.']
+            elif recipe_id in seen:
+                errors[index]['id'] = ['Recipe appears more than once.']
+            seen.add(recipe_id)
+
+        create_indexes = [
+            index for index, operation in enumerate(operations)
+            if operation['op'] == 'create'
+        ]
+        creates = serializers.RecipeDetailSerializer(
+            data=[operations[index]['data'] for index in create_indexes],
+            many=True,
+            context=context,
+        )
+        if not creates.is_valid():
+            for index, item_errors in zip(create_indexes, creates.errors):
+                errors[index].update(item_errors)
+
+        update_indexes = [
+            index for index, operation in enumerate(operations)
+            if operation['op'] == 'update' and not errors[index]
+        ]
+        updates = serializers.RecipeDetailSerializer(
+            [recipes[operations[index]['id']] for index in update_indexes],
+            data=[operations[index]['data'] for index in update_indexes],
+            many=True,
+            partial=True,
+            context=context,
+        )
+        if not updates.is_valid():
+            for index, item_errors in zip(update_indexes, updates.errors):
+                errors[index].update(item_errors)
+
+        return creates, updates, errors
+
+    def _bulk_errors(self, operations, errors):
+        """Return a 400 listing the errors of every operation in order"""
+        results = []
+        for operation, item_errors in zip(operations, errors):
+            if not isinstance(operation, dict):
+                operation = {}
+            results.append({
+                'op': operation.get('op'), 'id': operation.get('id'),
+                'errors': item_errors,
+            })
+        return Response(
+            {'results': results}, status=status.HTTP_400_BAD_REQUEST)
 
-class TagViewSet(mixins.DestroyModelMixin,
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """Stream every recipe of the user as NDJSON or CSV"""
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in EXPORT_FORMATS:
+            return Response(
+                {'type': [f'Choose one of {", ".join(EXPORT_FORMATS)}.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stream, content_type = EXPORT_FORMATS[export_type]
+        response = StreamingHttpResponse(
+            stream(request.user), content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{export_type}"')
+        return response
+
+    @action(detail=False, methods=['post'], url_path='bulk',
+            serializer_class=serializers.RecipeOperationSerializer)
+    def bulk(self, request):
+        """Create, update and delete many recipes in one transaction"""
+        operations = serializers.RecipeOperationSerializer(
+            data=request.data,
+            many=True,
+            max_length=self.bulk_max_operations,
+        )
+        if not operations.is_valid():
+            if isinstance(operations.errors, dict):
+                # Not a list, or too long, so no item to report against.
+                return Response(
+                    {'results': [], **operations.errors},
+                    status=status.HTTP_400_BAD_REQUEST)
+            return self._bulk_errors(request.data, operations.errors)
+        operations = operations.validated_data
+
+        recipes = Recipe.objects.filter(user=request.user).in_bulk(
+            [operation['id'] for operation in operations if 'id' in operation]
+        )
+        creates, updates, errors = self._validate_bulk(operations, recipes)
+        if any(errors):
+            return self._bulk_errors(operations, errors)
+
+        # Deletes send post_delete per recipe, so invalidate once instead.
+        with transaction.atomic(), batched_invalidation(request.user.id):
+            created = iter(creates.save(user=request.user))
+            if updates.instance:
+                updates.save()
+            Recipe.objects.filter(id__in=[
+                operation['id'] for operation in operations
+                if operation['op'] == 'delete'
+            ]).delete()
+
+        results = []
+        for operation in operations:
+            if operation['op'] == 'create':
+                recipe_id, code = next(created).id, status.HTTP_201_CREATED
+            elif operation['op'] == 'update':
+                recipe_id, code = operation['id'], status.HTTP_200_OK
+            else:
+                recipe_id, code = operation['id'], status.HTTP_204_NO_CONTENT
+            results.append(
+                {'op': operation['op'], 'id': recipe_id, 'status': code})
+
+        return Response({'results': results})
+
+
+@extend_schema_view(list=extend_schema(parameters=[
+    OpenApiParameter(
+        'assigned_only', OpenApiTypes.INT, enum=[0, 1],
+        description='Only list tags assigned to a recipe.'),
+    OpenApiParameter(
+        'recipe_count', OpenApiTypes.INT, enum=[0, 1],
+        description='Add recipe_count, the number of recipes using '
+                    'the tag, to every tag.'),
+]))
+class TagViewSet(CachedResponseMixin,
+                 mixins.DestroyModelMixin,
                  mixins.UpdateModelMixin,
                  mixins.ListModelMixin,
                  viewsets.GenericViewSet):
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = TagCursorPagination
+
+    def _flag(self, name):
+        """Read a 0/1 query param"""
+        try:
+            return bool(int(self.request.query_params.get(name, 0)))
+        except ValueError:
+            raise ValidationError({name: ['Expected 0 or 1.']})
 
     def get_queryset(self):
-        """Filter queryset fir authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        """Filter queryset for authenticated user."""
+        queryset = self.queryset.filter(
+            user=self.request.user
+        ).order_by('-name', 'id')
+        if self.action != 'list':
+            return queryset
+
+        assigned_only = self._flag('assigned_only')
+        if self._flag('recipe_count'):
+            # Grouped over the link table in the same query as the page.
+            queryset = queryset.annotate(recipe_count=Count('recipe'))
+            if assigned_only:
+                queryset = queryset.filter(recipe_count__gt=0)
+        elif assigned_only:
+            queryset = queryset.filter(Exists(
+                Recipe.tags.through.objects.filter(tag_id=OuterRef('pk'))))
+        return queryset
+
+    def get_serializer_class(self):
+        """Serialize the counts only when they were asked for"""
+        if self.action == 'list' and self._flag('recipe_count'):
+            return serializers.TagCountSerializer
+        return self.serializer_class
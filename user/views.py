@@ -1,6 +1,9 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+
+from core.authentication import CachedTokenAuthentication
 from user.serializers import (
     UserSerializer, AuthTokenSerializer)
 
@@ -18,9 +21,10 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
-        return self.request.user
+        # Token authentication only loads the id and is_active.
+        return get_user_model().objects.get(pk=self.request.user.pk)